@@ -78,11 +78,12 @@ def test_new_features():
     zotero_data_dir = str(Path(database_path).parent)
     
     try:
-        analysis = analyzer.analyze_paper(
-            test_paper, 
-            zotero_data_dir=zotero_data_dir,
-            collection_manager=collection_manager
-        )
+        with analyzer:
+            analysis = analyzer.analyze_paper(
+                test_paper,
+                zotero_data_dir=zotero_data_dir,
+                collection_paths=collection_manager.get_all_item_collection_paths()
+            )
         
         print("✅ 分析完成")
         print(f"   原标题: {analysis.title}")
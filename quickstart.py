@@ -6,8 +6,10 @@ Zotero 本地文献分析器 - 快速开始脚本
 它会检查环境、读取少量文献进行测试分析。
 """
 
+import argparse
 import os
 import sys
+from itertools import islice
 from pathlib import Path
 
 def check_dependencies():
@@ -15,7 +17,7 @@ def check_dependencies():
     print("🔍 检查依赖包...")
     
     required_packages = [
-        'loguru', 'tqdm', 'openai', 'tiktoken', 
+        'loguru', 'tqdm', 'openai', 'tiktoken', 'backoff',
         'fitz', 'pandas'  # fitz 是 PyMuPDF 的模块名
     ]
     
@@ -53,8 +55,8 @@ def check_api_key():
     
     # 2. 检查配置文件
     try:
-        from src.config import ConfigManager
-        config_manager = ConfigManager()
+        from src.config import get_config_manager
+        config_manager = get_config_manager()
         config = config_manager.load_config()
         
         if config.api_key:
@@ -87,7 +89,7 @@ def check_zotero_database():
         print(f"  ✅ 找到 Zotero 数据库: {reader.database_path}")
         
         # 读取少量数据进行测试
-        items = reader.get_all_items()[:5]  # 只读取前5篇
+        items = list(islice(reader.iter_all_items(), 5))  # 只读取前5篇，不加载整个文献库
         print(f"  ✅ 成功读取 {len(items)} 篇文献（测试）")
         
         return reader.database_path, items
@@ -97,6 +99,33 @@ def check_zotero_database():
         return None, None
 
 
+def create_test_analyzer(api_key):
+    """根据配置文件创建测试用的分析器"""
+    from src.analyzer import PaperAnalyzer
+    from src.config import get_config_manager
+    
+    # 读取配置文件获取其他参数
+    try:
+        config_manager = get_config_manager()
+        config = config_manager.load_config()
+        base_url = config.base_url
+        model = config.model
+        language = config.language
+        print(f"  📋 使用配置: 模型={model}, 语言={language}")
+    except Exception as e:
+        print(f"  ⚠️  读取配置失败，使用默认参数: {e}")
+        base_url = "https://api.openai.com/v1"
+        model = "gpt-4o-mini"  # 使用便宜的模型进行测试
+        language = "Chinese"
+    
+    return PaperAnalyzer(
+        api_key=api_key,
+        base_url=base_url,
+        model=model,
+        language=language
+    )
+
+
 def run_test_analysis(api_key, database_path, test_items):
     """运行测试分析"""
     print("\n🧪 运行测试分析...")
@@ -106,39 +135,19 @@ def run_test_analysis(api_key, database_path, test_items):
         return False
     
     try:
-        from src.analyzer import PaperAnalyzer
         from src.exporter import export_to_csv
-        from src.config import ConfigManager
-        
-        # 读取配置文件获取其他参数
-        try:
-            config_manager = ConfigManager()
-            config = config_manager.load_config()
-            base_url = config.base_url
-            model = config.model
-            language = config.language
-            print(f"  📋 使用配置: 模型={model}, 语言={language}")
-        except Exception as e:
-            print(f"  ⚠️  读取配置失败，使用默认参数: {e}")
-            base_url = "https://api.openai.com/v1"
-            model = "gpt-4o-mini"  # 使用便宜的模型进行测试
-            language = "Chinese"
         
         # 只分析第一篇文献
         test_item = test_items[0]
         print(f"  📖 测试文献: {test_item.get('title', 'Unknown')[:50]}...")
         
         # 初始化分析器
-        analyzer = PaperAnalyzer(
-            api_key=api_key,
-            base_url=base_url,
-            model=model,
-            language=language
-        )
+        analyzer = create_test_analyzer(api_key)
         
         # 分析文献
         zotero_data_dir = str(Path(database_path).parent)
-        analysis = analyzer.analyze_paper(test_item, zotero_data_dir)
+        with analyzer:
+            analysis = analyzer.analyze_paper(test_item, zotero_data_dir)
         
         if analysis.error_message:
             print(f"  ⚠️  分析有错误: {analysis.error_message}")
@@ -162,6 +171,49 @@ def run_test_analysis(api_key, database_path, test_items):
         return False
 
 
+def run_batch_analysis(api_key, database_path, test_items, batch_id=None):
+    """通过 Batch API 提交测试分析，或获取已提交任务的结果"""
+    print("\n📦 Batch API 测试分析...")
+    
+    if not test_items:
+        print("  ❌ 没有可用的测试文献")
+        return False
+    
+    try:
+        from src.exporter import export_to_csv
+        
+        analyzer = create_test_analyzer(api_key)
+        zotero_data_dir = str(Path(database_path).parent)
+        
+        if not batch_id:
+            batch_id = analyzer.submit_batch(test_items, zotero_data_dir, output_dir="test_output")
+            print(f"  ✅ 已提交批处理任务: {batch_id}")
+            print("  ⏳ 任务将在 24 小时内完成，之后运行以下命令获取结果:")
+            print(f"     python quickstart.py --batch-id {batch_id}")
+            return True
+        
+        analyses = analyzer.poll_batch(batch_id, test_items)
+        if analyses is None:
+            print(f"  ⏳ 批处理任务 {batch_id} 尚未完成，请稍后再试")
+            return True
+        
+        failed_count = sum(1 for a in analyses if a.error_message)
+        print(f"  ✅ 获取到 {len(analyses)} 篇文献的分析结果（失败 {failed_count} 篇）")
+        
+        # 导出测试结果
+        test_output_dir = "test_output"
+        Path(test_output_dir).mkdir(exist_ok=True)
+        
+        exported_files = export_to_csv(analyses, test_output_dir)
+        print(f"  ✅ 测试结果已导出到: {exported_files[0]}")
+        
+        return True
+        
+    except Exception as e:
+        print(f"  ❌ 批处理分析失败: {e}")
+        return False
+
+
 def show_next_steps():
     """显示后续步骤"""
     print("\n🚀 后续步骤:")
@@ -175,6 +227,19 @@ def show_next_steps():
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="Zotero 本地文献分析器 - 快速开始")
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='通过 Batch API 提交测试文献（费用减半，24 小时内完成）'
+    )
+    parser.add_argument(
+        '--batch-id',
+        type=str,
+        help='获取已提交的批处理任务结果'
+    )
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🎯 Zotero 本地文献分析器 - 快速开始")
     print("=" * 60)
@@ -201,7 +266,21 @@ def main():
         return
     
     # 4. 运行测试分析
-    if test_items:
+    if test_items and args.batch_id:
+        if run_batch_analysis(api_key, database_path, test_items, args.batch_id):
+            print("\n🎉 批处理结果获取完成！")
+        else:
+            print("\n⚠️  获取批处理结果失败，请检查任务 ID 和网络连接")
+    elif test_items and args.batch:
+        print(f"\n🎯 是否通过 Batch API 提交 {len(test_items)} 篇测试文献？费用为实时分析的一半")
+        response = input("输入 'y' 继续，其他任意键跳过: ").strip().lower()
+        
+        if response == 'y':
+            if not run_batch_analysis(api_key, database_path, test_items):
+                print("\n⚠️  提交失败，请检查 API 密钥、网络连接以及服务是否支持 Batch API")
+        else:
+            print("\n⏭️  跳过测试分析")
+    elif test_items:
         print("\n🎯 是否运行测试分析？这将调用 API 分析一篇文献（大约消耗 0.01-0.1 元）")
         response = input("输入 'y' 继续，其他任意键跳过: ").strip().lower()
         
@@ -1,13 +1,95 @@
 import os
-import fitz  # PyMuPDF
+import asyncio
+import functools
+import gzip
+import hashlib
+import json
+import threading
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from loguru import logger
-import tiktoken
-from openai import OpenAI
-import time
+import backoff
 import re
+import time
+
+# fitz（PyMuPDF）、tiktoken、openai 导入较慢，在首次使用时才导入，
+# 使只需要 PaperAnalysis 的模块（如导出器）和依赖检查保持快速启动
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# 可选：orjson 解析速度更快，未安装时回退到标准库 json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+def _is_not_retryable(e: Exception) -> bool:
+    """只有限流、超时和连接错误可通过退避重试恢复"""
+    from openai import RateLimitError, APITimeoutError, APIConnectionError
+    return not isinstance(e, (RateLimitError, APITimeoutError, APIConnectionError))
+
+
+def _notify_rate_limit(details: Dict):
+    """退避重试前回调：遇到限流错误时通知分析器的 on_rate_limit（如限流器降速）"""
+    from openai import RateLimitError
+    analyzer = details['args'][0]
+    if analyzer.on_rate_limit is not None and isinstance(details.get('exception'), RateLimitError):
+        analyzer.on_rate_limit()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoder():
+    """获取分词器（加载 BPE 表开销较大，每个进程只加载一次；gpt-4o 使用 o200k_base）"""
+    import tiktoken
+    return tiktoken.get_encoding("o200k_base")
+
+
+@functools.lru_cache(maxsize=None)
+def _get_text_flags() -> int:
+    """纯文本提取标志：合并行尾连字符断词，不保留连字（ﬁ 等展开为普通字母），不提取图片"""
+    import fitz  # PyMuPDF
+    return fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP | fitz.TEXT_DEHYPHENATE
+
+# 文献分析的系统提示模板，分析要求集中在这里，用户消息只携带论文信息
+_SYSTEM_PROMPT_TEMPLATE = """你是一位专业的学术论文分析专家，擅长提取论文的核心内容、创新点和价值。
+用户消息给出 TITLE、AUTHORS、MODE 和 TEXT。MODE 为 FULL 时 TEXT 是论文全文，为 ABSTRACT 时是论文摘要。
+请用{language}分析，以JSON对象返回以下字段（字段名使用英文）：
+- abstract: 重新整理和优化的论文摘要（FULL：200-300字；ABSTRACT：保持原意但更加清晰）
+- innovation_points: 主要创新点和贡献（FULL：3-5个要点，每个要点50-100字；ABSTRACT：基于摘要推断2-3个要点）
+- summary: 总体总结和评价（FULL：150-250字；ABSTRACT：100-150字）
+- translated_title: 仅当用户消息含 TRANSLATE_TITLE: YES 时返回，论文标题的中文翻译（只包含译文）"""
+
+# 多篇只有摘要的文献合并为一次请求时的系统提示模板
+_BULK_SYSTEM_PROMPT_TEMPLATE = """你是一位专业的学术论文分析专家，擅长提取论文的核心内容、创新点和价值。
+用户消息包含多篇论文，每篇以 "### PAPER 序号" 开头，给出 TITLE、AUTHORS 和 TEXT（论文摘要）。
+请用{language}逐篇分析，以JSON对象返回，只含字段 papers：一个数组，长度与论文篇数相同、顺序与用户消息一致，每个元素包含以下字段（字段名使用英文）：
+- abstract: 重新整理和优化的论文摘要（保持原意但更加清晰）
+- innovation_points: 基于摘要推断的2-3个主要创新点和贡献
+- summary: 总体总结和评价（100-150字）
+- translated_title: 仅当该篇含 TRANSLATE_TITLE: YES 时返回，论文标题的中文翻译（只包含译文）"""
+
+# PDF 解析是 CPU 密集型任务，放到进程池中跨论文并行（PyMuPDF 不支持多线程）
+_PDF_POOL: Optional[ProcessPoolExecutor] = None
+
+# 单次请求的最大输出 token 数（gpt-4o 的输出上限），合并分析按篇数预留的输出不超过该值
+_MAX_COMPLETION_TOKENS = 16384
+
+# 中日韩文字（CJK 统一表意文字、假名、韩文音节），出现即判定为非英文标题
+_CJK_RE = re.compile('[\u4e00-\u9fff\u3040-\u30ff\uac00-\ud7af]')
+
+# 提取后的 PDF 文本缓存目录，重复运行时跳过 PDF 解析
+_PDF_CACHE_DIR = Path.home() / ".cache" / "zotero-llm"
+
+# 行首行尾空白（不跨行）
+_LINE_EDGE_WS_RE = re.compile(r'^[^\S\n]+|[^\S\n]+$', re.MULTILINE)
+
+# 过短的行（含空行）和单独的页码行，连同行尾换行符一起匹配
+_JUNK_LINE_RE = re.compile(r'^(?:[^\n]{0,2}|\d+)(?:\n|\Z)', re.MULTILINE)
 
 @dataclass
 class PaperAnalysis:
@@ -30,7 +112,8 @@ class PaperAnalyzer:
                  model: str = "gpt-4o",
                  language: str = "Chinese",
                  max_pages: int = 50,
-                 max_tokens: int = 8000):
+                 max_tokens: int = 8000,
+                 on_rate_limit: Optional[Callable[[], None]] = None):
         """
         初始化文献分析器
         
@@ -41,16 +124,100 @@ class PaperAnalyzer:
             language: 输出语言
             max_pages: PDF 最大读取页数
             max_tokens: 最大 token 数量
+            on_rate_limit: 收到限流响应（429）时的回调，如 RateLimiter.on_rate_limit
         """
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.api_key = api_key
+        self.base_url = base_url
+        # AsyncOpenAI 的连接池绑定创建它的事件循环，因此按事件循环分别缓存客户端
+        self._aclients = weakref.WeakKeyDictionary()
+        # 同步接口共用的后台事件循环（首次调用时启动），所有同步调用复用同一个客户端和连接池
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        # close() 之后不再启动新的事件循环，仍在运行的工作线程也不会再发出请求
+        self._closed = False
         self.model = model
         self.language = language
         self.max_pages = max_pages
         self.max_tokens = max_tokens
-        self.enc = tiktoken.encoding_for_model("gpt-4o")  # 用于估算 token 数量
+        self.on_rate_limit = on_rate_limit
+        # 所有分析请求共用同一系统提示，只构建一次
+        self._system_prompt = _SYSTEM_PROMPT_TEMPLATE.format(language=language)
+        self._bulk_system_prompt = _BULK_SYSTEM_PROMPT_TEMPLATE.format(language=language)
         
         logger.info(f"初始化文献分析器: 模型={model}, 语言={language}, 最大页数={max_pages}, 最大tokens={max_tokens}")
     
+    @property
+    def aclient(self) -> "AsyncOpenAI":
+        """获取当前事件循环对应的异步客户端"""
+        from openai import AsyncOpenAI
+        
+        loop = asyncio.get_running_loop()
+        client = self._aclients.get(loop)
+        if client is None:
+            client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+            self._aclients[loop] = client
+        return client
+    
+    def _run(self, coro):
+        """
+        在共享的后台事件循环中运行协程并等待结果（线程安全，可从多个线程同时调用）
+        
+        Args:
+            coro: 要运行的协程
+            
+        Returns:
+            协程的返回值
+            
+        Raises:
+            RuntimeError: 分析器已关闭
+        """
+        with self._loop_lock:
+            if self._closed:
+                coro.close()
+                raise RuntimeError("分析器已关闭")
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="PaperAnalyzerLoop", daemon=True
+                )
+                self._loop_thread.start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    
+    async def aclose(self):
+        """关闭当前事件循环对应的异步客户端（在自行管理事件循环时于循环结束前调用）"""
+        client = self._aclients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+    
+    async def _shutdown_loop(self):
+        """取消后台事件循环中未完成的分析（等待结果的线程收到 CancelledError），再关闭客户端"""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.aclose()
+    
+    def close(self):
+        """关闭同步接口使用的后台事件循环及其客户端（如中断后仍有未完成的分析，将其取消；之后同步接口不可再用）"""
+        with self._loop_lock:
+            self._closed = True
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown_loop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
     def extract_pdf_text(self, pdf_path: str, max_pages: Optional[int] = None) -> str:
         """
         从 PDF 文件中提取文本
@@ -66,17 +233,16 @@ class PaperAnalyzer:
             max_pages = self.max_pages
             
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
-            
-            # 限制页数以避免过长的文本
-            num_pages = min(len(doc), max_pages)
-            
-            for page_num in range(num_pages):
-                page = doc[page_num]
-                text += page.get_text()
+            import fitz  # PyMuPDF
             
-            doc.close()
+            # 使用 with 确保出错时文档也会被关闭
+            with fitz.open(pdf_path) as doc:
+                # 限制页数以避免过长的文本
+                num_pages = min(len(doc), max_pages)
+                
+                # 先收集各页文本再一次性拼接，避免逐页 += 反复复制字符串
+                # PyMuPDF 不是线程安全的，同一文档的页面只能顺序读取
+                text = ''.join(doc[page_num].get_text("text", flags=_get_text_flags()) for page_num in range(num_pages))
             
             # 清理文本
             text = self._clean_text(text)
@@ -88,45 +254,332 @@ class PaperAnalyzer:
             logger.error(f"提取 PDF 文本失败 {pdf_path}: {e}")
             return ""
     
-    def _clean_text(self, text: str) -> str:
-        """清理提取的文本"""
-        # 删除过多的空行
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+    def extract_pdf_text_bounded(self, pdf_path: str, max_tokens: Optional[int] = None,
+                                 max_pages: Optional[int] = None) -> str:
+        """
+        从 PDF 文件中逐页提取文本，累计 token 数达到上限即停止读取
+        
+        Args:
+            pdf_path: PDF 文件路径
+            max_tokens: 最大 token 数（如果为None则使用实例设置）
+            max_pages: 最大读取页数（如果为None则使用实例设置）
+            
+        Returns:
+            清理并截断后的文本内容，无需再调用 truncate_text
+        """
+        if max_tokens is None:
+            max_tokens = self.max_tokens
+        if max_pages is None:
+            max_pages = self.max_pages
         
-        # 删除页眉页脚等重复内容
-        lines = text.split('\n')
-        cleaned_lines = []
+        return _extract_pdf_text_bounded(pdf_path, max_tokens, max_pages)
+    
+    @staticmethod
+    def _clean_text(text: str) -> str:
+        """清理提取的文本"""
+        # 去掉每行首尾空白
+        text = _LINE_EDGE_WS_RE.sub('', text)
         
-        for line in lines:
-            line = line.strip()
-            if len(line) < 3:  # 跳过过短的行
-                continue
-            if line.isdigit():  # 跳过单独的页码
-                continue
-            cleaned_lines.append(line)
+        # 删除空行、过短的行和单独的页码（一次正则扫描完成，不逐行循环）
+        text = _JUNK_LINE_RE.sub('', text)
         
-        return '\n'.join(cleaned_lines)
+        return text.rstrip('\n')
     
     def truncate_text(self, text: str, max_tokens: Optional[int] = None) -> str:
         """截断文本以适应模型的 token 限制"""
         if max_tokens is None:
             max_tokens = self.max_tokens
             
-        tokens = self.enc.encode(text)
-        if len(tokens) <= max_tokens:
+        # 每个 token 至少对应一个 UTF-8 字节，字节数不超过上限时无需编码
+        if len(text.encode('utf-8')) <= max_tokens:
             return text
         
+        # encode_ordinary 不扫描特殊 token，更快，且文本中出现 <|endoftext|> 等字样时不会报错
+        enc = _get_encoder()
+        
+        # 先只编码一段足够长的前缀（单个 token 平均远少于 8 个字符），避免对超长文本整体编码
+        prefix = text[:max_tokens * 8]
+        tokens = enc.encode_ordinary(prefix)
+        if len(tokens) <= max_tokens:
+            if len(prefix) == len(text):
+                return text
+            tokens = enc.encode_ordinary(text)
+            if len(tokens) <= max_tokens:
+                return text
+        
         truncated_tokens = tokens[:max_tokens]
-        return self.enc.decode(truncated_tokens)
+        return enc.decode(truncated_tokens)
+    
+    def analyze_paper(self, paper: Dict, zotero_data_dir: Optional[str] = None, collection_paths: Optional[Dict[str, List[str]]] = None,
+                      full_text: Optional[str] = None) -> PaperAnalysis:
+        """
+        分析单篇文献（同步接口，在共享的后台事件循环中运行 analyze_paper_async）
+        
+        Args:
+            paper: 文献数据字典
+            zotero_data_dir: Zotero 数据目录路径
+            collection_paths: 文献 key 到所属集合路径列表的映射（CollectionManager.get_all_item_collection_paths）
+            full_text: 预先提取的 PDF 全文（如 prefetch_pdf 的结果），为 None 时自行提取
+            
+        Returns:
+            文献分析结果
+        """
+        return self._run(self.analyze_paper_async(paper, zotero_data_dir, collection_paths, full_text))
+    
+    def analyze_papers_bulk(self, papers: List[Dict], collection_paths: Optional[Dict[str, List[str]]] = None) -> List[PaperAnalysis]:
+        """
+        在一次请求中分析多篇只有摘要的文献（同步接口，在共享的后台事件循环中运行 analyze_papers_bulk_async）
+        
+        Args:
+            papers: 文献数据字典列表，每篇都应有摘要
+            collection_paths: 文献 key 到所属集合路径列表的映射（CollectionManager.get_all_item_collection_paths）
+            
+        Returns:
+            与 papers 顺序一致的文献分析结果列表
+        """
+        return self._run(self.analyze_papers_bulk_async(papers, collection_paths))
+    
+    async def analyze_papers_bulk_async(self, papers: List[Dict],
+                                        collection_paths: Optional[Dict[str, List[str]]] = None) -> List[PaperAnalysis]:
+        """
+        在一次请求中分析多篇只有摘要的文献，多篇共用系统提示和一次网络往返
+        
+        不读取 PDF 全文；请求或解析失败时直接抛出异常，由调用方改为逐篇分析
+        
+        Args:
+            papers: 文献数据字典列表，每篇都应有摘要
+            collection_paths: 文献 key 到所属集合路径列表的映射（CollectionManager.get_all_item_collection_paths）
+            
+        Returns:
+            与 papers 顺序一致的文献分析结果列表
+            
+        Raises:
+            ValueError: 响应篇数不符或缺少必需字段
+        """
+        titles = [paper.get('title', '未知标题') for paper in papers]
+        authors_list = [self._format_authors(paper.get('creators', [])) for paper in papers]
+        translate_flags = [self._is_english_title(title) for title in titles]
+        
+        blocks = []
+        for n, (paper, title, authors, translate_title) in enumerate(zip(papers, titles, authors_list, translate_flags), 1):
+            translation_line = "TRANSLATE_TITLE: YES\n" if translate_title else ""
+            text = self.truncate_text(paper.get('abstractNote', ''))
+            blocks.append(f"### PAPER {n}\nTITLE: {title}\nAUTHORS: {authors}\n{translation_line}TEXT:\n{text}")
+        
+        messages = [
+            {"role": "system", "content": self._bulk_system_prompt},
+            {"role": "user", "content": "\n\n".join(blocks)}
+        ]
+        
+        logger.info(f"合并分析 {len(papers)} 篇文献")
+        response = await self._create_completion(
+            messages=messages,
+            temperature=0.3,
+            max_tokens=min(2000 * len(papers), _MAX_COMPLETION_TOKENS),
+            response_format={"type": "json_object"}
+        )
+        
+        results = _json_loads(response.choices[0].message.content).get('papers')
+        if not isinstance(results, list) or len(results) != len(papers):
+            raise ValueError(f"响应篇数与请求不符: 期望 {len(papers)} 篇")
+        
+        analyses = []
+        for paper, title, authors, translate_title, result in zip(papers, titles, authors_list, translate_flags, results):
+            required_fields = ['abstract', 'innovation_points', 'summary']
+            if translate_title:
+                required_fields.append('translated_title')
+            if not isinstance(result, dict) or not all(field in result for field in required_fields):
+                raise ValueError(f"响应缺少必需字段: {required_fields}")
+            
+            analyses.append(PaperAnalysis(
+                title=title,
+                translated_title=result['translated_title'] if translate_title else "",
+                authors=authors,
+                collection_path=self._get_collection_path(paper, collection_paths),
+                abstract=result['abstract'],
+                innovation_points=result['innovation_points'],
+                summary=result['summary']
+            ))
+        
+        return analyses
+    
+    async def analyze_papers(self,
+                             papers: List[Dict],
+                             zotero_data_dir: Optional[str] = None,
+                             collection_paths: Optional[Dict[str, List[str]]] = None,
+                             concurrency: int = 20) -> List[PaperAnalysis]:
+        """
+        并发分析多篇文献
+        
+        Args:
+            papers: 文献数据字典列表
+            zotero_data_dir: Zotero 数据目录路径
+            collection_paths: 文献 key 到所属集合路径列表的映射（CollectionManager.get_all_item_collection_paths）
+            concurrency: 同时进行的最大请求数
+            
+        Returns:
+            与 papers 顺序一致的文献分析结果列表
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def analyze_with_limit(paper: Dict) -> PaperAnalysis:
+            async with semaphore:
+                return await self.analyze_paper_async(paper, zotero_data_dir, collection_paths)
+        
+        return await asyncio.gather(*(analyze_with_limit(paper) for paper in papers))
+    
+    def submit_batch(self, papers: List[Dict], zotero_data_dir: Optional[str] = None, output_dir: str = "output") -> str:
+        """
+        通过 Batch API 提交批量分析任务（费用减半，24 小时内完成）
+        
+        Args:
+            papers: 文献数据字典列表
+            zotero_data_dir: Zotero 数据目录路径
+            output_dir: 请求文件（.jsonl）的保存目录
+            
+        Returns:
+            批处理任务 ID
+        """
+        batch_requests = []
+        for index, paper in enumerate(papers):
+            title = paper.get('title', '未知标题')
+            full_text = self._extract_full_text(paper, zotero_data_dir)
+            analysis_text = full_text or paper.get('abstractNote', '')
+            
+            if not analysis_text:
+                logger.warning(f"文献 {title} 没有可用的文本内容，跳过提交")
+                continue
+            
+            messages = self._build_analysis_messages(
+                title,
+                self._format_authors(paper.get('creators', [])),
+                analysis_text,
+                bool(full_text),
+                self._is_english_title(title)
+            )
+            batch_requests.append({
+                "custom_id": paper.get('key') or str(index),
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": self.model,
+                    "messages": messages,
+                    "temperature": 0.3,
+                    "max_tokens": 2000,
+                    "response_format": {"type": "json_object"}
+                }
+            })
+        
+        if not batch_requests:
+            raise ValueError("没有可提交的文献")
+        
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+        requests_file = output_path / f"batch_requests_{int(time.time())}.jsonl"
+        with open(requests_file, 'w', encoding='utf-8') as f:
+            for request in batch_requests:
+                f.write(json.dumps(request, ensure_ascii=False) + '\n')
+        
+        from openai import OpenAI
+        
+        client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        with open(requests_file, 'rb') as f:
+            batch_file = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        
+        logger.info(f"已提交批处理任务 {batch.id}，共 {len(batch_requests)} 篇文献，请求文件: {requests_file}")
+        return batch.id
+    
+    def poll_batch(self, batch_id: str, papers: List[Dict],
+                   collection_paths: Optional[Dict[str, List[str]]] = None) -> Optional[List[PaperAnalysis]]:
+        """
+        查询批处理任务，完成后下载并解析结果
+        
+        Args:
+            batch_id: submit_batch 返回的任务 ID
+            papers: 提交时使用的文献数据字典列表
+            collection_paths: 文献 key 到所属集合路径列表的映射（CollectionManager.get_all_item_collection_paths）
+            
+        Returns:
+            与 papers 顺序一致的文献分析结果列表，任务未完成时返回 None
+        """
+        from openai import OpenAI
+        
+        client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+        batch = client.batches.retrieve(batch_id)
+        
+        if batch.status in ('failed', 'expired', 'cancelled'):
+            raise RuntimeError(f"批处理任务 {batch_id} 状态异常: {batch.status}")
+        if batch.status != 'completed':
+            logger.info(f"批处理任务 {batch_id} 尚未完成，当前状态: {batch.status}")
+            return None
+        
+        # 按 custom_id 收集每篇文献的响应：成功的请求在输出文件中，失败的请求在错误文件中
+        responses = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            output = client.files.content(file_id).text
+            for line in output.splitlines():
+                if line.strip():
+                    record = _json_loads(line)
+                    responses[record['custom_id']] = record
+        
+        analyses = []
+        for index, paper in enumerate(papers):
+            title = paper.get('title', '未知标题')
+            translate_title = self._is_english_title(title)
+            original_abstract = paper.get('abstractNote', '')
+            analysis = PaperAnalysis(
+                title=title,
+                authors=self._format_authors(paper.get('creators', [])),
+                collection_path=self._get_collection_path(paper, collection_paths)
+            )
+            
+            record = responses.get(paper.get('key') or str(index))
+            try:
+                if record is None:
+                    raise ValueError("批处理结果中没有该文献")
+                if record.get('error'):
+                    raise ValueError(record['error'].get('message', str(record['error'])))
+                response = record.get('response') or {}
+                if response.get('status_code') != 200:
+                    error = response.get('body', {}).get('error') or {}
+                    raise ValueError(error.get('message') or f"请求失败，状态码 {response.get('status_code')}")
+                
+                content = response['body']['choices'][0]['message']['content']
+                result = self._parse_analysis_content(content, translate_title)
+                
+                analysis.translated_title = result.get('translated_title', '') if translate_title else ""
+                analysis.abstract = result.get('abstract', original_abstract if original_abstract else "无摘要")
+                analysis.innovation_points = result.get('innovation_points', '')
+                analysis.summary = result.get('summary', '')
+            except Exception as e:
+                logger.error(f"批处理结果解析失败 {title}: {e}")
+                analysis.abstract = original_abstract if original_abstract else "无摘要"
+                analysis.innovation_points = f"分析失败: {str(e)}"
+                analysis.summary = f"分析失败: {str(e)}"
+                analysis.error_message = str(e)
+            
+            analyses.append(analysis)
+        
+        logger.info(f"批处理任务 {batch_id} 解析完成，共 {len(analyses)} 篇文献")
+        return analyses
     
-    def analyze_paper(self, paper: Dict, zotero_data_dir: Optional[str] = None, collection_manager=None) -> PaperAnalysis:
+    async def analyze_paper_async(self, paper: Dict, zotero_data_dir: Optional[str] = None, collection_paths: Optional[Dict[str, List[str]]] = None,
+                                  full_text: Optional[str] = None) -> PaperAnalysis:
         """
         分析单篇文献
         
         Args:
             paper: 文献数据字典
             zotero_data_dir: Zotero 数据目录路径
-            collection_manager: 集合管理器，用于获取文献所属集合信息
+            collection_paths: 文献 key 到所属集合路径列表的映射（CollectionManager.get_all_item_collection_paths）
+            full_text: 预先提取的 PDF 全文（如 prefetch_pdf 的结果），为 None 时自行提取
             
         Returns:
             文献分析结果
@@ -138,36 +591,20 @@ class PaperAnalyzer:
         
         logger.info(f"开始分析文献: {title}")
         
-        # 翻译英文标题
-        translated_title = self._translate_title(title)
+        # 英文标题的翻译合并在分析请求中完成，非英文标题直接跳过
+        translate_title = self._is_english_title(title)
         
         # 获取集合路径
-        collection_path = ""
-        if collection_manager and paper.get('key'):
-            try:
-                collection_paths = collection_manager.get_item_collection_paths(paper['key'])
-                collection_path = " | ".join(collection_paths) if collection_paths else "未分类"
-            except Exception as e:
-                logger.warning(f"获取集合路径失败: {e}")
-                collection_path = "未知"
-        
-        # 尝试获取 PDF 全文
-        full_text = ""
-        attachments = paper.get('attachments', [])
+        collection_path = self._get_collection_path(paper, collection_paths)
         
-        for attachment in attachments:
-            if attachment.get('contentType') == 'application/pdf':
-                pdf_path = self._get_attachment_path(attachment, paper.get('key'), zotero_data_dir)
-                if pdf_path and os.path.exists(pdf_path):
-                    full_text = self.extract_pdf_text(pdf_path)
-                    if full_text:
-                        logger.info(f"成功提取 PDF 全文: {len(full_text)} 字符")
-                        break
-                else:
-                    logger.warning(f"PDF 文件不存在: {pdf_path}")
+        # 尝试获取 PDF 全文（已预取时直接使用）
+        if full_text is None:
+            full_text = await self._extract_full_text_async(paper, zotero_data_dir)
         
         if not full_text and not original_abstract:
             logger.warning(f"文献 {title} 没有可用的文本内容")
+            # 没有分析请求可以合并，单独翻译标题
+            translated_title = await self._translate_title_async(title)
             return PaperAnalysis(
                 title=title,
                 translated_title=translated_title,
@@ -184,11 +621,13 @@ class PaperAnalyzer:
         
         # 调用大模型进行分析
         try:
-            analysis_result = self._call_llm_analysis(title, authors, analysis_text, bool(full_text))
+            analysis_result = await self._call_llm_analysis_async(
+                title, authors, analysis_text, bool(full_text), translate_title
+            )
             
             return PaperAnalysis(
                 title=title,
-                translated_title=translated_title,
+                translated_title=analysis_result.get('translated_title', '') if translate_title else "",
                 authors=authors,
                 collection_path=collection_path,
                 abstract=analysis_result.get('abstract', original_abstract if original_abstract else "无摘要"),
@@ -200,7 +639,6 @@ class PaperAnalyzer:
             logger.error(f"LLM 分析失败 {title}: {e}")
             return PaperAnalysis(
                 title=title,
-                translated_title=translated_title,
                 authors=authors,
                 collection_path=collection_path,
                 abstract=original_abstract if original_abstract else "无摘要",
@@ -209,6 +647,92 @@ class PaperAnalyzer:
                 error_message=str(e)
             )
     
+    def _get_collection_path(self, paper: Dict, collection_paths: Optional[Dict[str, List[str]]] = None) -> str:
+        """从预先查询的映射中获取文献所属集合路径"""
+        if collection_paths is None or not paper.get('key'):
+            return ""
+        
+        return " | ".join(collection_paths.get(paper['key'], ())) or "未分类"
+    
+    def cache_key(self, paper: Dict, zotero_data_dir: Optional[str] = None) -> str:
+        """
+        计算分析结果的缓存键
+        
+        由模型、语言、提取参数、文献 key、标题、修改时间，以及 PDF 附件的路径、修改时间和大小决定，
+        其中任一变化都会得到新的键
+        
+        Args:
+            paper: 文献数据字典
+            zotero_data_dir: Zotero 数据目录路径
+            
+        Returns:
+            缓存键（十六进制 SHA-1）
+        """
+        parts = [
+            self.model, self.language, str(self.max_pages), str(self.max_tokens),
+            paper.get('key') or '', paper.get('title', ''), paper.get('dateModified') or ''
+        ]
+        for attachment in paper.get('attachments', []):
+            if attachment.get('contentType') == 'application/pdf':
+                pdf_path = self._get_attachment_path(attachment, paper.get('key'), zotero_data_dir)
+                if not pdf_path:
+                    continue
+                try:
+                    stat = os.stat(pdf_path)
+                except OSError:
+                    continue
+                parts.append(f"{pdf_path}:{stat.st_mtime}:{stat.st_size}")
+        
+        return hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()
+    
+    def _iter_pdf_paths(self, paper: Dict, zotero_data_dir: Optional[str]):
+        """依次返回文献中存在于磁盘上的 PDF 附件路径"""
+        for attachment in paper.get('attachments', []):
+            if attachment.get('contentType') == 'application/pdf':
+                pdf_path = self._get_attachment_path(attachment, paper.get('key'), zotero_data_dir)
+                if pdf_path and os.path.exists(pdf_path):
+                    yield pdf_path
+                else:
+                    logger.warning(f"PDF 文件不存在: {pdf_path}")
+    
+    def _extract_full_text(self, paper: Dict, zotero_data_dir: Optional[str]) -> str:
+        """提取文献第一个可用 PDF 附件的全文"""
+        for pdf_path in self._iter_pdf_paths(paper, zotero_data_dir):
+            full_text = self.extract_pdf_text_bounded(pdf_path)
+            if full_text:
+                logger.info(f"成功提取 PDF 全文: {len(full_text)} 字符")
+                return full_text
+        
+        return ""
+    
+    async def _extract_full_text_async(self, paper: Dict, zotero_data_dir: Optional[str]) -> str:
+        """在进程池中提取 PDF 全文，多篇论文的解析并行进行且不阻塞事件循环"""
+        loop = asyncio.get_running_loop()
+        for pdf_path in self._iter_pdf_paths(paper, zotero_data_dir):
+            full_text = await loop.run_in_executor(
+                _get_pdf_pool(), _extract_pdf_text_bounded,
+                pdf_path, self.max_tokens, self.max_pages
+            )
+            if full_text:
+                logger.info(f"成功提取 PDF 全文: {len(full_text)} 字符")
+                return full_text
+        
+        return ""
+    
+    def prefetch_pdf(self, paper: Dict, zotero_data_dir: Optional[str] = None) -> Future:
+        """
+        在进程池中提前提取文献的 PDF 全文，可在前一篇文献等待 API 响应时进行
+        
+        Args:
+            paper: 文献数据字典
+            zotero_data_dir: Zotero 数据目录路径
+            
+        Returns:
+            结果为 PDF 全文（无可用 PDF 时为空字符串）的 Future，可传给 analyze_paper 的 full_text
+        """
+        pdf_paths = list(self._iter_pdf_paths(paper, zotero_data_dir))
+        return _get_pdf_pool().submit(_extract_first_pdf_text, pdf_paths, self.max_tokens, self.max_pages)
+    
     def _format_authors(self, creators: List[Dict]) -> str:
         """格式化作者信息"""
         author_names = []
@@ -225,7 +749,7 @@ class PaperAnalyzer:
         return '; '.join(author_names) if author_names else '未知作者'
     
     def _get_attachment_path(self, attachment: Dict, item_key: str, zotero_data_dir: Optional[str]) -> Optional[str]:
-        """获取附件的完整路径"""
+        """获取附件的完整路径（不检查文件是否存在，由调用方统一检查）"""
         if not attachment.get('path'):
             return None
         
@@ -250,16 +774,26 @@ class PaperAnalyzer:
             # 链接到外部文件
             full_path = Path(attachment_path)
         
-        return str(full_path) if full_path.exists() else None
+        return str(full_path)
     
-    def _is_english_title(self, title: str) -> bool:
-        """检测标题是否为英文"""
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _is_english_title(title: str) -> bool:
+        """检测标题是否为英文（结果按标题缓存）"""
         # 简单的英文检测：如果标题中英文字符占比超过70%，则认为是英文
         if not title:
             return False
         
-        english_chars = sum(1 for char in title if char.isascii() and char.isalpha())
-        total_chars = sum(1 for char in title if char.isalpha())
+        # 含中日韩文字的标题无需翻译，直接返回
+        if _CJK_RE.search(title):
+            return False
+        
+        # 一次遍历同时统计字母总数和其中的 ASCII 字母数
+        english_chars = total_chars = 0
+        for char in title:
+            if char.isalpha():
+                total_chars += 1
+                english_chars += char.isascii()
         
         if total_chars == 0:
             return False
@@ -267,7 +801,7 @@ class PaperAnalyzer:
         english_ratio = english_chars / total_chars
         return english_ratio > 0.7
 
-    def _translate_title(self, title: str) -> str:
+    async def _translate_title_async(self, title: str) -> str:
         """翻译英文标题为中文"""
         if not self._is_english_title(title):
             return ""  # 不是英文标题，返回空字符串
@@ -284,8 +818,7 @@ class PaperAnalyzer:
                 }
             ]
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = await self._create_completion(
                 messages=messages,
                 temperature=0.1,
                 max_tokens=200
@@ -299,107 +832,181 @@ class PaperAnalyzer:
             logger.error(f"标题翻译失败: {e}")
             return ""
     
-    def _call_llm_analysis(self, title: str, authors: str, text: str, has_full_text: bool) -> Dict:
-        """调用大模型进行文献分析"""
+    # 等待 2s、4s、8s…并叠加 0-1s 随机抖动；协程中由 asyncio.sleep 等待，不阻塞其他并发请求
+    @backoff.on_exception(backoff.expo, Exception, max_tries=5, factor=2,
+                          jitter=backoff.random_jitter, giveup=_is_not_retryable,
+                          on_backoff=_notify_rate_limit)
+    async def _create_completion(self, **kwargs):
+        """调用聊天补全接口，限流、超时和连接错误按指数退避重试"""
+        return await self.aclient.chat.completions.create(model=self.model, **kwargs)
+    
+    def _build_analysis_messages(self, title: str, authors: str, text: str, has_full_text: bool,
+                                 translate_title: bool = False) -> List[Dict]:
+        """构建文献分析请求的消息列表（说明放在共用的系统提示中，用户消息只含论文信息）"""
+        # 截断文本以适应模型限制（全文在提取时已按 token 上限截断）
+        truncated_text = text if has_full_text else self.truncate_text(text)
         
-        # 截断文本以适应模型限制
-        truncated_text = self.truncate_text(text)
+        # 标题翻译作为额外字段并入同一次请求
+        translation_line = "TRANSLATE_TITLE: YES\n" if translate_title else ""
+        mode = "FULL" if has_full_text else "ABSTRACT"
         
-        if has_full_text:
-            prompt = f"""
-请分析以下学术论文的完整文本，并提供结构化的分析结果。
-
-论文标题：{title}
-作者：{authors}
-
-论文全文：
-{truncated_text}
-
-请用{self.language}回答以下问题，并以JSON格式返回结果：
-
-1. abstract: 重新整理和优化的论文摘要（200-300字）
-2. innovation_points: 论文的主要创新点和贡献（3-5个要点，每个要点50-100字）
-3. summary: 论文的总体总结和评价（150-250字）
-
-请确保返回有效的JSON格式，字段名使用英文，内容使用{self.language}。
-"""
-        else:
-            prompt = f"""
-请分析以下学术论文的摘要，并提供结构化的分析结果。
-
-论文标题：{title}
-作者：{authors}
-
-论文摘要：
-{truncated_text}
-
-请用{self.language}回答以下问题，并以JSON格式返回结果：
-
-1. abstract: 重新整理和优化的论文摘要（保持原意但更加清晰）
-2. innovation_points: 基于摘要推断的主要创新点（2-3个要点）
-3. summary: 基于摘要的总体总结和评价（100-150字）
-
-请确保返回有效的JSON格式，字段名使用英文，内容使用{self.language}。
-"""
-
-        messages = [
+        prompt = f"TITLE: {title}\nAUTHORS: {authors}\nMODE: {mode}\n{translation_line}TEXT:\n{truncated_text}"
+        
+        return [
             {
                 "role": "system",
-                "content": f"你是一位专业的学术论文分析专家，擅长提取论文的核心内容、创新点和价值。请用{self.language}进行回答，并确保返回格式严格遵循JSON格式。"
+                "content": self._system_prompt
             },
             {
                 "role": "user",
                 "content": prompt
             }
         ]
+    
+    def _parse_analysis_content(self, content: str, translate_title: bool = False) -> Dict:
+        """解析大模型返回的 JSON 分析结果并验证必需字段"""
+        # 请求使用 JSON 模式，响应即为 JSON 对象，无需去除代码块标记
+        result = _json_loads(content)
+        
+        # 验证必需字段
+        required_fields = ['abstract', 'innovation_points', 'summary']
+        if translate_title:
+            required_fields.append('translated_title')
+        if not all(field in result for field in required_fields):
+            raise ValueError(f"响应缺少必需字段: {required_fields}")
+        
+        return result
+    
+    async def _call_llm_analysis_async(self, title: str, authors: str, text: str, has_full_text: bool,
+                                       translate_title: bool = False) -> Dict:
+        """调用大模型进行文献分析（translate_title 为 True 时同时翻译英文标题）"""
+        messages = self._build_analysis_messages(title, authors, text, has_full_text, translate_title)
         
+        # 网络与限流错误由 _create_completion 退避重试；JSON 模式保证响应可解析，
+        # 这里只重试缺少字段（或因长度截断而不完整）的响应
         max_retries = 3
+        temperature = 0.3
         for attempt in range(max_retries):
+            logger.debug(f"调用 LLM 分析，尝试 {attempt + 1}/{max_retries}")
+            
+            response = await self._create_completion(
+                messages=messages,
+                temperature=temperature,
+                max_tokens=2000,
+                response_format={"type": "json_object"}
+            )
+            
+            content = response.choices[0].message.content
             try:
-                logger.debug(f"调用 LLM 分析，尝试 {attempt + 1}/{max_retries}")
-                
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=0.3,
-                    max_tokens=2000
-                )
-                
-                content = response.choices[0].message.content.strip()
-                
-                # 尝试解析 JSON
-                if content.startswith('```json'):
-                    content = content.replace('```json', '').replace('```', '').strip()
-                elif content.startswith('```'):
-                    content = content.replace('```', '').strip()
+                result = self._parse_analysis_content(content, translate_title)
+                logger.debug("LLM 分析成功")
+                return result
                 
-                # 解析 JSON 响应
-                import json
-                result = json.loads(content)
-                
-                # 验证必需字段
-                required_fields = ['abstract', 'innovation_points', 'summary']
-                if all(field in result for field in required_fields):
-                    logger.debug("LLM 分析成功")
-                    return result
-                else:
-                    raise ValueError(f"响应缺少必需字段: {required_fields}")
-                    
-            except json.JSONDecodeError as e:
-                logger.warning(f"JSON 解析失败，尝试 {attempt + 1}: {e}")
+            except ValueError as e:
+                logger.warning(f"响应格式不完整，尝试 {attempt + 1}: {e}")
                 if attempt == max_retries - 1:
-                    # 返回原始响应作为总结
-                    return {
-                        'abstract': truncated_text[:300],
-                        'innovation_points': f"解析失败，原始响应: {content[:200]}",
-                        'summary': f"解析失败，原始响应: {content[:200]}"
-                    }
-            except Exception as e:
-                logger.error(f"LLM 调用失败，尝试 {attempt + 1}: {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(2)  # 等待后重试
-                else:
                     raise
+            
+            # 降低温度重新请求，使输出更稳定
+            temperature = 0.0
+
+
+def _extract_pdf_text_bounded(pdf_path: str, max_tokens: int, max_pages: int) -> str:
+    """
+    逐页提取 PDF 文本并在 token 上限处截断，结果缓存到磁盘
+    
+    定义在模块级以便提交到进程池（子进程无法序列化实例方法）
+    """
+    cache_file = _pdf_cache_file(pdf_path, max_tokens, max_pages)
+    if cache_file is not None and cache_file.exists():
+        try:
+            text = gzip.decompress(cache_file.read_bytes()).decode('utf-8')
+            logger.debug(f"使用缓存的 PDF 文本: {pdf_path}")
+            return text
+        except Exception as e:
+            logger.debug(f"读取 PDF 文本缓存失败 {cache_file}: {e}")
+    
+    text = _read_pdf_text_bounded(pdf_path, max_tokens, max_pages)
+    
+    # 提取失败不缓存，下次仍会重试
+    if text and cache_file is not None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免多个进程同时写入时读到不完整的缓存
+            tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            tmp_file.write_bytes(gzip.compress(text.encode('utf-8'), compresslevel=6))
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            logger.debug(f"写入 PDF 文本缓存失败 {cache_file}: {e}")
+    
+    return text
+
+
+def _extract_first_pdf_text(pdf_paths: List[str], max_tokens: int, max_pages: int) -> str:
+    """依次提取 PDF，返回第一个非空的全文（在进程池中运行）"""
+    for pdf_path in pdf_paths:
+        full_text = _extract_pdf_text_bounded(pdf_path, max_tokens, max_pages)
+        if full_text:
+            logger.info(f"成功提取 PDF 全文: {len(full_text)} 字符")
+            return full_text
+    
+    return ""
+
+
+def _pdf_cache_file(pdf_path: str, max_tokens: int, max_pages: int) -> Optional[Path]:
+    """根据 PDF 路径、修改时间、大小及提取参数计算缓存文件路径"""
+    try:
+        stat = os.stat(pdf_path)
+    except OSError:
+        return None
+    key = hashlib.sha1(
+        f"{pdf_path}:{stat.st_mtime}:{stat.st_size}:{max_pages}:{max_tokens}".encode('utf-8')
+    ).hexdigest()
+    return _PDF_CACHE_DIR / f"{key}.txt.gz"
+
+
+def _read_pdf_text_bounded(pdf_path: str, max_tokens: int, max_pages: int) -> str:
+    """逐页读取 PDF 文本，累计 token 数达到上限即停止"""
+    try:
+        import fitz  # PyMuPDF
+        
+        enc = _get_encoder()
+        text_flags = _get_text_flags()
+        parts = []
+        token_count = 0
         
-        # 如果所有重试都失败，抛出异常
-        raise Exception("LLM 分析失败，已达到最大重试次数") 
\ No newline at end of file
+        # 使用 with 确保出错时文档也会被关闭
+        with fitz.open(pdf_path) as doc:
+            num_pages = min(len(doc), max_pages)
+            
+            for page_num in range(num_pages):
+                page_text = PaperAnalyzer._clean_text(doc[page_num].get_text("text", flags=text_flags))
+                if not page_text:
+                    continue
+                if parts:
+                    page_text = '\n' + page_text
+                
+                # 只对新读入的一页编码，累计 token 数
+                tokens = enc.encode_ordinary(page_text)
+                remaining = max_tokens - token_count
+                if len(tokens) >= remaining:
+                    parts.append(enc.decode(tokens[:remaining]))
+                    break
+                parts.append(page_text)
+                token_count += len(tokens)
+        
+        text = ''.join(parts)
+        logger.debug(f"从 {pdf_path} 提取了 {len(text)} 个字符的文本")
+        return text
+        
+    except Exception as e:
+        logger.error(f"提取 PDF 文本失败 {pdf_path}: {e}")
+        return ""
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """获取 PDF 解析进程池（首次使用时创建）"""
+    global _PDF_POOL
+    if _PDF_POOL is None:
+        _PDF_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _PDF_POOL
@@ -0,0 +1,69 @@
+import json
+import os
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+from loguru import logger
+from .analyzer import PaperAnalysis
+
+
+class AnalysisCache:
+    """
+    文献分析结果的磁盘缓存
+
+    每条结果以 JSON 文件保存在缓存目录中，文件名为 PaperAnalyzer.cache_key 计算的键。
+    文献元数据和 PDF 未变化时，重复运行直接复用结果，不再调用 API。
+    """
+
+    def __init__(self, cache_dir: Path):
+        """
+        初始化分析结果缓存
+
+        Args:
+            cache_dir: 缓存目录
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        logger.info(f"启用分析结果缓存: {self.cache_dir}")
+
+    def _cache_file(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[PaperAnalysis]:
+        """
+        读取缓存的分析结果
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的分析结果，未命中或缓存损坏时返回 None
+        """
+        cache_file = self._cache_file(key)
+        try:
+            data = json.loads(cache_file.read_bytes())
+            return PaperAnalysis(**data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"读取分析结果缓存失败 {cache_file}: {e}")
+            return None
+
+    def set(self, key: str, analysis: PaperAnalysis):
+        """
+        保存分析结果（失败的分析不应缓存，由调用方判断）
+
+        Args:
+            key: 缓存键
+            analysis: 文献分析结果
+        """
+        cache_file = self._cache_file(key)
+        try:
+            # 先写临时文件再替换，避免并发写入时读到不完整的缓存
+            tmp_file = cache_file.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            tmp_file.write_text(json.dumps(asdict(analysis), ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            logger.debug(f"写入分析结果缓存失败 {cache_file}: {e}")
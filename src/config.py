@@ -6,13 +6,31 @@
 支持默认配置、用户配置和运行时配置的分层管理。
 """
 
+import copy
+import functools
 import json
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional, List, Set, Tuple
+from dataclasses import dataclass, asdict, fields, replace
 from loguru import logger
 
+# 可选：orjson 读写更快，未安装时回退到标准库 json（两者都直接处理 UTF-8 字节）
+try:
+    import orjson
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+
+# 合并分析的最大篇数：每篇预留约 2000 个输出 token，8 篇不超过模型单次输出上限
+MAX_BULK_SIZE = 8
+
 
 @dataclass
 class AnalyzerConfig:
@@ -34,7 +52,12 @@ class AnalyzerConfig:
     selected_collections: List[str] = None
     
     # 处理配置
-    delay: float = 1.0
+    concurrency: int = 8
+    delay: float = 1.0  # 未设置 rpm 时换算为 rpm = 60 / delay
+    rpm: Optional[int] = None  # 每分钟最大请求数
+    tpm: Optional[int] = None  # 每分钟最大 token 数
+    use_cache: bool = True  # 复用输出目录 .cache 中的分析结果
+    bulk_size: int = 1  # 只有摘要的文献每次请求合并分析的篇数，1 表示不合并
     max_pages: int = 50
     max_tokens: int = 8000
     
@@ -55,11 +78,25 @@ class AnalyzerConfig:
             self.exclude_keywords = []
         if self.selected_collections is None:
             self.selected_collections = []
+        if not 1 <= self.bulk_size <= MAX_BULK_SIZE:
+            clamped = min(max(1, self.bulk_size), MAX_BULK_SIZE)
+            logger.warning(f"bulk_size={self.bulk_size} 超出范围 1-{MAX_BULK_SIZE}，按 {clamped} 处理")
+            self.bulk_size = clamped
+
+
+# AnalyzerConfig 的全部字段名
+_ANALYZER_FIELDS = frozenset(field.name for field in fields(AnalyzerConfig))
+
+# 默认配置内容固定，模块加载时序列化一次
+_DEFAULT_CONFIG_JSON = _json_dumps(asdict(AnalyzerConfig()))
 
 
 class ConfigManager:
     """配置管理器"""
     
+    # 本进程中已确认存在的默认配置文件
+    _default_checked: Set[Path] = set()
+    
     def __init__(self, config_dir: str = "config"):
         """
         初始化配置管理器
@@ -74,37 +111,55 @@ class ConfigManager:
         self.user_config_file = self.config_dir / "user.json"
         self.recent_config_file = self.config_dir / "recent.json"
         
+        # 已解析配置的缓存：文件路径 -> (修改时间, 文件大小, 配置对象)
+        self._parse_cache: Dict[Path, Tuple[int, int, AnalyzerConfig]] = {}
+        
         # 创建默认配置文件
         self._create_default_config()
         
         logger.info(f"配置管理器初始化完成，配置目录: {self.config_dir}")
     
     def _create_default_config(self):
-        """创建默认配置文件"""
-        if not self.default_config_file.exists():
-            default_config = AnalyzerConfig()
-            self._save_config_to_file(default_config, self.default_config_file)
+        """创建默认配置文件（每个进程对同一文件只检查一次）"""
+        if self.default_config_file in ConfigManager._default_checked:
+            return
+        
+        try:
+            # 'x' 模式在文件已存在时失败，无需先检查再写入
+            with open(self.default_config_file, 'xb') as f:
+                f.write(_DEFAULT_CONFIG_JSON)
             logger.info("创建默认配置文件")
+        except FileExistsError:
+            pass
+        
+        ConfigManager._default_checked.add(self.default_config_file)
     
     def _save_config_to_file(self, config: AnalyzerConfig, file_path: Path):
         """保存配置到文件"""
         try:
             config_dict = asdict(config)
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(config_dict, f, indent=2, ensure_ascii=False)
+            with open(file_path, 'wb') as f:
+                f.write(_json_dumps(config_dict))
+            self.invalidate_cache(file_path)
             logger.debug(f"配置已保存到: {file_path}")
         except Exception as e:
             logger.error(f"保存配置失败 {file_path}: {e}")
             raise
     
     def _load_config_from_file(self, file_path: Path) -> Optional[AnalyzerConfig]:
-        """从文件加载配置"""
-        if not file_path.exists():
+        """从文件加载配置（文件未变化时直接返回缓存的解析结果副本）"""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
             return None
         
+        cached = self._parse_cache.get(file_path)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return copy.deepcopy(cached[2])
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                config_dict = json.load(f)
+            with open(file_path, 'rb') as f:
+                config_dict = _json_loads(f.read())
             
             # 处理可能的 None 值
             for key in ['include_types', 'exclude_keywords', 'selected_collections']:
@@ -112,6 +167,7 @@ class ConfigManager:
                     config_dict[key] = []
             
             config = AnalyzerConfig(**config_dict)
+            self._parse_cache[file_path] = (stat.st_mtime_ns, stat.st_size, copy.deepcopy(config))
             logger.debug(f"配置已从 {file_path} 加载")
             return config
             
@@ -119,6 +175,18 @@ class ConfigManager:
             logger.error(f"加载配置失败 {file_path}: {e}")
             return None
     
+    def invalidate_cache(self, file_path: Optional[Path] = None):
+        """
+        使配置解析缓存失效
+        
+        Args:
+            file_path: 要失效的配置文件，为 None 时清空全部缓存
+        """
+        if file_path is None:
+            self._parse_cache.clear()
+        else:
+            self._parse_cache.pop(Path(file_path), None)
+    
     def load_config(self) -> AnalyzerConfig:
         """
         加载配置（分层合并）
@@ -135,7 +203,8 @@ class ConfigManager:
         # 加载用户配置
         user_config = self._load_config_from_file(self.user_config_file)
         
-        if user_config is None:
+        # 用户配置不存在或与默认配置相同时无需合并
+        if user_config is None or user_config == default_config:
             return default_config
         
         # 合并配置
@@ -144,15 +213,14 @@ class ConfigManager:
     
     def _merge_configs(self, base_config: AnalyzerConfig, override_config: AnalyzerConfig) -> AnalyzerConfig:
         """合并两个配置对象"""
-        base_dict = asdict(base_config)
-        override_dict = asdict(override_config)
-        
-        # 合并字典，非空值覆盖基础值
-        for key, value in override_dict.items():
+        # 只收集需要覆盖的字段，非空值覆盖基础值（不再用 asdict 深拷贝两个配置）
+        changes = {}
+        for field in fields(override_config):
+            value = getattr(override_config, field.name)
             if value is not None and value != "" and value != []:
-                base_dict[key] = value
+                changes[field.name] = value
         
-        return AnalyzerConfig(**base_dict)
+        return replace(base_config, **changes)
     
     def save_user_config(self, config: AnalyzerConfig):
         """保存用户配置"""
@@ -176,15 +244,12 @@ class ConfigManager:
             current_config = AnalyzerConfig()
         
         # 更新指定字段
-        current_dict = asdict(current_config)
-        for key, value in kwargs.items():
-            if hasattr(current_config, key):
-                current_dict[key] = value
-            else:
-                logger.warning(f"忽略未知配置字段: {key}")
+        changes = {key: value for key, value in kwargs.items() if key in _ANALYZER_FIELDS}
+        for key in kwargs.keys() - _ANALYZER_FIELDS:
+            logger.warning(f"忽略未知配置字段: {key}")
         
         # 保存更新后的配置
-        updated_config = AnalyzerConfig(**current_dict)
+        updated_config = replace(current_config, **changes)
         self.save_user_config(updated_config)
         
         return updated_config
@@ -231,13 +296,12 @@ class ConfigManager:
         config = self.load_config()
         export_file = Path(export_path)
         
-        # 导出时移除敏感信息
-        export_dict = asdict(config)
-        if export_dict.get('api_key'):
-            export_dict['api_key'] = "YOUR_API_KEY_HERE"
+        # 导出时移除敏感信息（浅拷贝字段即可，序列化时不会修改列表）
+        safe_config = replace(config, api_key="YOUR_API_KEY_HERE") if config.api_key else config
+        export_dict = {field.name: getattr(safe_config, field.name) for field in fields(safe_config)}
         
-        with open(export_file, 'w', encoding='utf-8') as f:
-            json.dump(export_dict, f, indent=2, ensure_ascii=False)
+        with open(export_file, 'wb') as f:
+            f.write(_json_dumps(export_dict))
         
         logger.info(f"配置已导出到: {export_path}")
     
@@ -383,8 +447,9 @@ class ConfigWizard:
 
 
 # 便捷函数
+@functools.lru_cache(maxsize=1)
 def get_config_manager() -> ConfigManager:
-    """获取配置管理器实例"""
+    """获取配置管理器实例（每个进程只创建一次）"""
     return ConfigManager()
 
 
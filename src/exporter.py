@@ -1,14 +1,47 @@
+import codecs
 import csv
+import functools
+import io
 import os
-from datetime import datetime
-from typing import List
+import re
+import time
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
 from pathlib import Path
 from loguru import logger
 from .analyzer import PaperAnalysis
 
+# CSV 写入缓冲区大小
+_CSV_BUFFER_SIZE = 1 << 20
+
+# 文件名中只保留字母、数字（含中文等 Unicode 字符）和 "._-"
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r"[^\w.\-]")
+
 class CSVExporter:
     """CSV 导出器"""
     
+    # 作者数量范围标签，按 min(作者数量, 11) 索引
+    _AUTHOR_RANGE = (
+        "未知作者", "单作者", "2-3作者", "2-3作者", "4-5作者", "4-5作者",
+        "6-10作者", "6-10作者", "6-10作者", "6-10作者", "6-10作者", "10+作者"
+    )
+    
+    # 主结果字段（删除原始摘要，添加集合路径和翻译标题）
+    _FIELDS_MAIN = (
+        '序号', 'Zotero集合', '论文标题', '中文标题', '作者',
+        '优化摘要', '创新点', '总结', '分析状态', '错误信息'
+    )
+    
+    # 详细报告字段（删除原始摘要相关字段）
+    _FIELDS_DETAIL = (
+        '序号', 'Zotero集合', '论文标题', '中文标题', '作者', '作者数量',
+        '优化摘要', '摘要字数', '创新点', '创新点字数', '总结', '总结字数',
+        '分析状态', '错误信息', '标题长度', '有翻译标题'
+    )
+    
+    # 文件名中的时间戳格式
+    _TS_FMT = "%Y%m%d_%H%M%S"
+    
     def __init__(self, output_dir: str = "output"):
         """
         初始化 CSV 导出器
@@ -21,6 +54,49 @@ class CSVExporter:
         
         logger.info(f"初始化 CSV 导出器，输出目录: {self.output_dir}")
     
+    def _make_timestamp(self) -> str:
+        """生成文件名时间戳（time.strftime 无需构造 datetime 对象）"""
+        return time.strftime(self._TS_FMT, time.localtime())
+    
+    def _build_filename(self, prefix: str, collection_names: List[str] = None) -> str:
+        """
+        生成带时间戳的输出文件名
+        
+        Args:
+            prefix: 文件名前缀
+            collection_names: 选择的集合名称列表，最多使用前3个
+            
+        Returns:
+            CSV 文件名
+        """
+        timestamp = self._make_timestamp()
+        
+        # 如果有集合名称，添加到文件名中
+        if collection_names:
+            # 清理集合名称，去除特殊字符
+            collection_str = "_".join(_UNSAFE_FILENAME_CHARS_RE.sub("", name) for name in collection_names[:3])
+            return f"{prefix}_{collection_str}_{timestamp}.csv"
+        
+        return f"{prefix}_{timestamp}.csv"
+    
+    def _write_csv(self, csv_path: Path, rows: Iterable, header: Optional[tuple] = None):
+        """
+        写入 CSV 文件（UTF-8 带 BOM，便于 Excel 识别中文）
+        
+        Args:
+            csv_path: 输出文件路径
+            rows: 数据行
+            header: 表头，为 None 时不写表头
+        """
+        # 以二进制模式打开并手动写入 BOM，文本层只负责编码，由 1 MiB 缓冲区合并写入
+        with open(csv_path, 'wb', buffering=_CSV_BUFFER_SIZE) as raw:
+            raw.write(codecs.BOM_UTF8)
+            with io.TextIOWrapper(raw, encoding='utf-8', newline='') as text:
+                writer = csv.writer(text)
+                if header is not None:
+                    writer.writerow(header)
+                writer.writerows(rows)
+    
     def export_analyses(self, analyses: List[PaperAnalysis], filename: str = None, collection_names: List[str] = None) -> str:
         """
         导出文献分析结果到 CSV 文件
@@ -34,72 +110,71 @@ class CSVExporter:
             生成的 CSV 文件路径
         """
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # 如果有集合名称，添加到文件名中
-            if collection_names:
-                # 清理集合名称，去除特殊字符
-                clean_names = []
-                for name in collection_names[:3]:  # 最多使用前3个集合名
-                    clean_name = "".join(c for c in name if c.isalnum() or c in "._-")
-                    clean_names.append(clean_name)
-                collection_str = "_".join(clean_names)
-                filename = f"zotero_analysis_{collection_str}_{timestamp}.csv"
-            else:
-                filename = f"zotero_analysis_{timestamp}.csv"
+            filename = self._build_filename("zotero_analysis", collection_names)
         
         csv_path = self.output_dir / filename
         
-        # 定义 CSV 字段（删除原始摘要，添加集合路径和翻译标题）
-        fieldnames = [
-            '序号',
-            'Zotero集合',
-            '论文标题',
-            '中文标题',
-            '作者',
-            '优化摘要', 
-            '创新点',
-            '总结',
-            '分析状态',
-            '错误信息'
-        ]
-        
         logger.info(f"开始导出 {len(analyses)} 篇文献分析结果到 {csv_path}")
         
-        with open(csv_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            # 写入表头
-            writer.writeheader()
-            
-            # 写入数据
-            for idx, analysis in enumerate(analyses, 1):
-                # 处理标题显示
-                title_display = analysis.title
-                chinese_title = analysis.translated_title if analysis.translated_title else ""
-                
-                # 如果有中文翻译，在原标题后添加翻译
-                if chinese_title:
-                    title_display = f"{analysis.title}"
-                
-                row = {
-                    '序号': idx,
-                    'Zotero集合': analysis.collection_path,
-                    '论文标题': title_display,
-                    '中文标题': chinese_title,
-                    '作者': analysis.authors,
-                    '优化摘要': analysis.abstract,
-                    '创新点': analysis.innovation_points,
-                    '总结': analysis.summary,
-                    '分析状态': '成功' if not analysis.error_message else '失败',
-                    '错误信息': analysis.error_message
-                }
-                
-                writer.writerow(row)
+        # 按表头顺序构造每行数据
+        rows = (self._main_row(idx, analysis) for idx, analysis in enumerate(analyses, 1))
+        self._write_csv(csv_path, rows, header=self._FIELDS_MAIN)
         
         logger.success(f"CSV 文件导出完成: {csv_path}")
         return str(csv_path)
     
+    def export_analyses_streaming(self, analyses: Iterable[PaperAnalysis], filename: str = None,
+                                  collection_names: List[str] = None) -> Tuple[str, List[PaperAnalysis]]:
+        """
+        边分析边导出文献分析结果：每得到一篇结果立即写入并刷新到文件，
+        程序中断时已写入的结果不会丢失
+        
+        Args:
+            analyses: 文献分析结果（可以是逐篇产生结果的生成器）
+            filename: 输出文件名，如果为 None 则自动生成
+            collection_names: 选择的集合名称列表，用于文件命名
+            
+        Returns:
+            (生成的 CSV 文件路径, 已写入的分析结果列表，供统计和详细报告使用)
+        """
+        if filename is None:
+            filename = self._build_filename("zotero_analysis", collection_names)
+        
+        csv_path = self.output_dir / filename
+        
+        logger.info(f"开始逐篇导出文献分析结果到 {csv_path}")
+        
+        written = []
+        with open(csv_path, 'wb', buffering=_CSV_BUFFER_SIZE) as raw:
+            raw.write(codecs.BOM_UTF8)
+            with io.TextIOWrapper(raw, encoding='utf-8', newline='') as text:
+                writer = csv.writer(text)
+                writer.writerow(self._FIELDS_MAIN)
+                for idx, analysis in enumerate(analyses, 1):
+                    writer.writerow(self._main_row(idx, analysis))
+                    # 每篇结果都刷新到操作系统，进程中断时文件中保留已完成的结果
+                    text.flush()
+                    written.append(analysis)
+        
+        logger.success(f"CSV 文件导出完成: {csv_path}（共 {len(written)} 篇）")
+        return str(csv_path), written
+    
+    @staticmethod
+    def _main_row(idx: int, analysis: PaperAnalysis) -> tuple:
+        """按主结果表头顺序构造一行数据"""
+        return (
+            idx,
+            analysis.collection_path,
+            analysis.title,
+            analysis.translated_title or "",
+            analysis.authors,
+            analysis.abstract,
+            analysis.innovation_points,
+            analysis.summary,
+            '成功' if not analysis.error_message else '失败',
+            analysis.error_message
+        )
+    
     def export_summary_statistics(self, analyses: List[PaperAnalysis], filename: str = None, collection_names: List[str] = None) -> str:
         """
         导出统计摘要信息
@@ -113,84 +188,60 @@ class CSVExporter:
             生成的统计文件路径
         """
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # 如果有集合名称，添加到文件名中
-            if collection_names:
-                # 清理集合名称，去除特殊字符
-                clean_names = []
-                for name in collection_names[:3]:  # 最多使用前3个集合名
-                    clean_name = "".join(c for c in name if c.isalnum() or c in "._-")
-                    clean_names.append(clean_name)
-                collection_str = "_".join(clean_names)
-                filename = f"zotero_statistics_{collection_str}_{timestamp}.csv"
-            else:
-                filename = f"zotero_statistics_{timestamp}.csv"
+            filename = self._build_filename("zotero_statistics", collection_names)
         
         csv_path = self.output_dir / filename
         
-        # 计算统计信息
+        # 一次遍历同时统计成功数、错误类型和作者数量分布
         total_papers = len(analyses)
-        successful_analyses = sum(1 for a in analyses if not a.error_message)
-        failed_analyses = total_papers - successful_analyses
-        
-        # 统计不同错误类型
-        error_types = {}
+        successful_analyses = 0
+        error_types = Counter()
+        author_counts = Counter()
+        author_range = self._AUTHOR_RANGE
         for analysis in analyses:
-            if analysis.error_message:
-                error_type = analysis.error_message.split(':')[0] if ':' in analysis.error_message else analysis.error_message
-                error_types[error_type] = error_types.get(error_type, 0) + 1
+            # 每个属性只读取一次
+            error_message, authors = analysis.error_message, analysis.authors
+            if error_message:
+                error_types[error_message.partition(':')[0]] += 1
+            else:
+                successful_analyses += 1
+            
+            author_count = authors.count(';') + 1 if authors != '未知作者' else 0
+            author_counts[author_range[min(author_count, 11)]] += 1
         
-        # 统计作者数量分布
-        author_counts = {}
-        for analysis in analyses:
-            author_count = len(analysis.authors.split(';')) if analysis.authors != '未知作者' else 0
-            author_count_range = self._get_author_count_range(author_count)
-            author_counts[author_count_range] = author_counts.get(author_count_range, 0) + 1
+        failed_analyses = total_papers - successful_analyses
         
         logger.info(f"开始导出统计信息到 {csv_path}")
         
-        with open(csv_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.writer(csvfile)
-            
-            # 写入基本统计信息
-            writer.writerow(['统计项目', '数值'])
-            writer.writerow(['总论文数', total_papers])
-            writer.writerow(['成功分析数', successful_analyses])
-            writer.writerow(['失败分析数', failed_analyses])
-            writer.writerow(['成功率', f"{(successful_analyses/total_papers*100):.1f}%" if total_papers > 0 else "0%"])
-            writer.writerow([])  # 空行
-            
-            # 写入错误类型统计
-            writer.writerow(['错误类型统计'])
-            writer.writerow(['错误类型', '数量'])
-            for error_type, count in sorted(error_types.items()):
-                writer.writerow([error_type, count])
-            writer.writerow([])  # 空行
-            
-            # 写入作者数量分布
-            writer.writerow(['作者数量分布'])
-            writer.writerow(['作者数量范围', '论文数量'])
-            for range_name, count in sorted(author_counts.items()):
-                writer.writerow([range_name, count])
+        # 基本统计信息
+        rows = [
+            ('统计项目', '数值'),
+            ('总论文数', total_papers),
+            ('成功分析数', successful_analyses),
+            ('失败分析数', failed_analyses),
+            ('成功率', f"{(successful_analyses/total_papers*100):.1f}%" if total_papers > 0 else "0%"),
+            (),  # 空行
+        ]
+        
+        # 错误类型统计
+        rows.append(('错误类型统计',))
+        rows.append(('错误类型', '数量'))
+        rows.extend(sorted(error_types.items()))
+        rows.append(())  # 空行
+        
+        # 作者数量分布
+        rows.append(('作者数量分布',))
+        rows.append(('作者数量范围', '论文数量'))
+        rows.extend(sorted(author_counts.items()))
+        
+        self._write_csv(csv_path, rows)
         
         logger.success(f"统计文件导出完成: {csv_path}")
         return str(csv_path)
     
     def _get_author_count_range(self, count: int) -> str:
         """获取作者数量范围标签"""
-        if count == 0:
-            return "未知作者"
-        elif count == 1:
-            return "单作者"
-        elif count <= 3:
-            return "2-3作者"
-        elif count <= 5:
-            return "4-5作者"
-        elif count <= 10:
-            return "6-10作者"
-        else:
-            return "10+作者"
+        return self._AUTHOR_RANGE[min(count, 11)]
     
     def export_detailed_report(self, analyses: List[PaperAnalysis], filename: str = None, collection_names: List[str] = None) -> str:
         """
@@ -205,77 +256,51 @@ class CSVExporter:
             生成的详细报告文件路径
         """
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            
-            # 如果有集合名称，添加到文件名中
-            if collection_names:
-                # 清理集合名称，去除特殊字符
-                clean_names = []
-                for name in collection_names[:3]:  # 最多使用前3个集合名
-                    clean_name = "".join(c for c in name if c.isalnum() or c in "._-")
-                    clean_names.append(clean_name)
-                collection_str = "_".join(clean_names)
-                filename = f"zotero_detailed_report_{collection_str}_{timestamp}.csv"
-            else:
-                filename = f"zotero_detailed_report_{timestamp}.csv"
+            filename = self._build_filename("zotero_detailed_report", collection_names)
         
         csv_path = self.output_dir / filename
         
-        # 定义详细报告字段（删除原始摘要相关字段）
-        fieldnames = [
-            '序号',
-            'Zotero集合',
-            '论文标题',
-            '中文标题',
-            '作者',
-            '作者数量',
-            '优化摘要',
-            '摘要字数',
-            '创新点',
-            '创新点字数',
-            '总结',
-            '总结字数',
-            '分析状态',
-            '错误信息',
-            '标题长度',
-            '有翻译标题'
-        ]
-        
         logger.info(f"开始导出详细报告到 {csv_path}")
         
-        with open(csv_path, 'w', newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            
-            # 写入表头
-            writer.writeheader()
-            
-            # 写入数据
-            for idx, analysis in enumerate(analyses, 1):
-                author_count = len(analysis.authors.split(';')) if analysis.authors != '未知作者' else 0
-                
-                row = {
-                    '序号': idx,
-                    'Zotero集合': analysis.collection_path,
-                    '论文标题': analysis.title,
-                    '中文标题': analysis.translated_title if analysis.translated_title else "",
-                    '作者': analysis.authors,
-                    '作者数量': author_count,
-                    '优化摘要': analysis.abstract,
-                    '摘要字数': len(analysis.abstract),
-                    '创新点': analysis.innovation_points,
-                    '创新点字数': len(analysis.innovation_points),
-                    '总结': analysis.summary,
-                    '总结字数': len(analysis.summary),
-                    '分析状态': '成功' if not analysis.error_message else '失败',
-                    '错误信息': analysis.error_message,
-                    '标题长度': len(analysis.title),
-                    '有翻译标题': '是' if analysis.translated_title else '否'
-                }
-                
-                writer.writerow(row)
+        # 按表头顺序逐行生成数据
+        self._write_csv(csv_path, self._iter_detail_rows(analyses), header=self._FIELDS_DETAIL)
         
         logger.success(f"详细报告导出完成: {csv_path}")
         return str(csv_path)
+    
+    @staticmethod
+    def _iter_detail_rows(analyses: List[PaperAnalysis]):
+        """逐行生成详细报告数据，由 csv.writer.writerows 直接消费，不在内存中保留整表"""
+        for idx, analysis in enumerate(analyses, 1):
+            # 多处使用的属性先读到局部变量
+            title, translated_title, authors = analysis.title, analysis.translated_title, analysis.authors
+            abstract, innovation_points, summary = analysis.abstract, analysis.innovation_points, analysis.summary
+            error_message = analysis.error_message
+            
+            yield (
+                idx,
+                analysis.collection_path,
+                title,
+                translated_title or "",
+                authors,
+                authors.count(';') + 1 if authors != '未知作者' else 0,
+                abstract,
+                len(abstract),
+                innovation_points,
+                len(innovation_points),
+                summary,
+                len(summary),
+                '成功' if not error_message else '失败',
+                error_message,
+                len(title),
+                '是' if translated_title else '否'
+            )
+
+
+@functools.lru_cache(maxsize=8)
+def _get_exporter(output_dir: str) -> CSVExporter:
+    """按输出目录缓存导出器，重复导出时不再重复创建目录"""
+    return CSVExporter(output_dir)
 
 
 def export_to_csv(analyses: List[PaperAnalysis], 
@@ -296,7 +321,7 @@ def export_to_csv(analyses: List[PaperAnalysis],
     Returns:
         生成的文件路径列表
     """
-    exporter = CSVExporter(output_dir)
+    exporter = _get_exporter(output_dir)
     
     exported_files = []
     
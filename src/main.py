@@ -22,31 +22,49 @@ python zotero_analyzer_enhanced.py [选项]
 """
 
 import argparse
+import functools
 import os
+import re
 import sys
+import threading
+from contextlib import closing
 from pathlib import Path
-from typing import List, Optional, Dict
-from tqdm import tqdm
+from typing import TYPE_CHECKING, Dict, Generator, Iterable, List, Optional, Tuple
 from loguru import logger
-import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 
 # 导入自定义模块
-from zotero_reader import get_local_zotero_items, LocalZoteroReader
-from analyzer import PaperAnalyzer, PaperAnalysis
-from exporter import CSVExporter
-from config import ConfigManager, AnalyzerConfig, ConfigWizard, load_config, save_config
-from selector import select_collections_interactive, get_available_collections
+# 分析、导出、数据库相关模块及 tqdm 在使用时才导入，
+# 使 --config-summary、--config-export 等只操作配置的命令快速启动
+from config import AnalyzerConfig, ConfigWizard, MAX_BULK_SIZE, load_config, save_config, get_config_manager
+
+if TYPE_CHECKING:
+    from analyzer import PaperAnalyzer, PaperAnalysis
+    from rate_limiter import RateLimiter
+    from selector import CollectionManager
+    from zotero_reader import LocalZoteroReader
+
+
+# 控制台和日志文件共用的日志格式
+_LOG_FORMAT = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+
+# 日志是否已设置，重复调用 setup_logger 时直接返回
+_LOGGER_CONFIGURED = False
 
 
 def setup_logger(config: AnalyzerConfig):
-    """设置日志记录器"""
+    """设置日志记录器（每个进程只设置一次）"""
+    global _LOGGER_CONFIGURED
+    if _LOGGER_CONFIGURED:
+        return
+    _LOGGER_CONFIGURED = True
+    
     logger.remove()
     
     log_level = "DEBUG" if config.debug else config.log_level
-    log_format = "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
     
     # 控制台输出
-    logger.add(sys.stdout, level=log_level, format=log_format)
+    logger.add(sys.stdout, level=log_level, format=_LOG_FORMAT)
     
     # 文件输出
     log_dir = Path("logs")
@@ -54,53 +72,94 @@ def setup_logger(config: AnalyzerConfig):
     logger.add(
         log_dir / "zotero_analyzer_{time:YYYY-MM-DD}.log",
         level=log_level,
-        format=log_format,
+        format=_LOG_FORMAT,
         rotation="1 day",
         retention="30 days"
     )
 
 
-def filter_papers(papers: List[dict], config: AnalyzerConfig) -> List[dict]:
+@functools.lru_cache(maxsize=4)
+def _get_reader(database_path: Optional[str] = None) -> "LocalZoteroReader":
+    """按数据库路径缓存读取器，自动检测数据库路径只进行一次"""
+    from zotero_reader import LocalZoteroReader
+    return LocalZoteroReader(database_path)
+
+
+@functools.lru_cache(maxsize=4)
+def _get_collection_manager(database_path: str) -> "CollectionManager":
+    """按数据库路径缓存集合管理器，集合树只加载一次"""
+    from selector import CollectionManager
+    return CollectionManager(database_path)
+
+
+def _authors(paper: dict) -> str:
+    """拼接文献创作者姓名，用于分析失败时的结果"""
+    return "; ".join(creator.get("name", "") for creator in paper.get("creators") or ())
+
+
+def filter_papers(papers: Iterable[dict], config: AnalyzerConfig) -> List[dict]:
     """
     根据配置过滤文献列表
     
     Args:
-        papers: 原始文献列表
+        papers: 原始文献（列表或逐篇读取的迭代器）
         config: 分析器配置
         
     Returns:
         过滤后的文献列表
     """
-    filtered_papers = papers.copy()
-    
-    # 按类型过滤
-    if config.include_types:
-        filtered_papers = [p for p in filtered_papers if p.get('typeName') in config.include_types]
-        logger.info(f"按类型过滤后剩余 {len(filtered_papers)} 篇文献")
-    
-    # 按关键词排除
+    include_types = frozenset(config.include_types or ())
+    # 所有排除关键词合并为一个正则，每个标题只扫描一次
+    exclude_pattern = None
     if config.exclude_keywords:
-        original_count = len(filtered_papers)
-        filtered_papers = [
-            p for p in filtered_papers 
-            if not any(keyword.lower() in p.get('title', '').lower() for keyword in config.exclude_keywords)
-        ]
-        excluded_count = original_count - len(filtered_papers)
-        if excluded_count > 0:
-            logger.info(f"按关键词排除了 {excluded_count} 篇文献，剩余 {len(filtered_papers)} 篇")
-    
-    # 限制数量
-    if config.limit and len(filtered_papers) > config.limit:
-        filtered_papers = filtered_papers[:config.limit]
-        logger.info(f"限制处理数量为 {config.limit} 篇文献")
+        exclude_pattern = re.compile("|".join(re.escape(keyword.lower()) for keyword in config.exclude_keywords))
+    limit = config.limit
+    
+    # 一次遍历同时完成类型过滤、关键词排除和数量限制
+    filtered_papers = []
+    scanned = 0
+    type_kept = 0
+    kw_excluded = 0
+    limit_reached = False
+    for paper in papers:
+        scanned += 1
+        
+        # 按类型过滤
+        if include_types and paper.get('typeName') not in include_types:
+            continue
+        type_kept += 1
+        
+        # 按关键词排除
+        if exclude_pattern is not None and exclude_pattern.search(paper.get('title', '').lower()):
+            kw_excluded += 1
+            continue
+        
+        # 限制数量，达到上限后不再检查剩余文献
+        if limit and len(filtered_papers) == limit:
+            limit_reached = True
+            break
+        filtered_papers.append(paper)
+    
+    if scanned == 0:
+        logger.warning("未找到任何文献，请检查数据库路径或集合选择")
+        return filtered_papers
+    
+    logger.info(f"共读取 {scanned} 篇文献")
+    if include_types:
+        logger.info(f"按类型过滤后剩余 {type_kept} 篇文献")
+    if kw_excluded > 0:
+        logger.info(f"按关键词排除了 {kw_excluded} 篇文献，剩余 {type_kept - kw_excluded} 篇")
+    if limit_reached:
+        logger.info(f"限制处理数量为 {limit} 篇文献")
     
     return filtered_papers
 
 
 def analyze_papers_batch(papers: List[dict], 
-                        analyzer: PaperAnalyzer,
+                        analyzer: "PaperAnalyzer",
                         config: AnalyzerConfig,
-                        zotero_data_dir: Optional[str] = None) -> List[PaperAnalysis]:
+                        zotero_data_dir: Optional[str] = None,
+                        rate_limiter: Optional["RateLimiter"] = None) -> Tuple[List["PaperAnalysis"], int]:
     """
     批量分析文献
     
@@ -109,67 +168,193 @@ def analyze_papers_batch(papers: List[dict],
         analyzer: 文献分析器
         config: 分析器配置
         zotero_data_dir: Zotero 数据目录
+        rate_limiter: 请求限流器，为 None 时按配置创建
         
     Returns:
-        分析结果列表
+        (分析结果列表, 其中失败的篇数)，失败篇数在收集结果时累计，无需再遍历结果列表
     """
-    analyses = []
+    from tqdm import tqdm
+    from analyzer import PaperAnalysis
+    from cache import AnalysisCache
+    from rate_limiter import RateLimiter
+    
     total_papers = len(papers)
+    # 按原始顺序存放结果，保证输出顺序与输入一致
+    analyses: List[Optional[PaperAnalysis]] = [None] * total_papers
+    failed_count = 0
+    
+    logger.info(f"开始批量分析 {total_papers} 篇文献（并发数: {config.concurrency}）")
+    
+    if rate_limiter is None:
+        rate_limiter = RateLimiter.from_config(config)
     
-    logger.info(f"开始批量分析 {total_papers} 篇文献")
+    # 元数据和 PDF 未变化的文献直接复用上次的分析结果
+    cache = AnalysisCache(Path(config.output_dir) / ".cache") if config.use_cache else None
     
-    with tqdm(total=total_papers, desc="分析进度") as pbar:
-        for i, paper in enumerate(papers):
+    workers = max(1, config.concurrency)
+    
+    # 没有 PDF 附件、只用摘要分析的文献按 bulk_size 篇合并为一次请求，其余文献逐篇分析
+    single_indices = []
+    bulk_indices = []
+    for i, paper in enumerate(papers):
+        if config.bulk_size > 1 and paper.get('abstractNote') and not any(
+                attachment.get('contentType') == 'application/pdf' for attachment in paper.get('attachments', [])):
+            bulk_indices.append(i)
+        else:
+            single_indices.append(i)
+    
+    # PDF 预取：逐篇分析的第 n 篇开始时，在进程池中提前解析第 n + workers 篇（下一篇轮到的文献）的 PDF，
+    # 使 PDF 解析与 API 请求重叠；同时最多持有 workers 篇的预取结果
+    prefetched: Dict[int, Future] = {}
+    prefetch_lock = threading.Lock()
+    
+    def prefetch(n: int):
+        if n < len(single_indices) and n not in prefetched:
+            prefetched[n] = analyzer.prefetch_pdf(papers[single_indices[n]], zotero_data_dir)
+    
+    def get_cached(paper: dict) -> Tuple[Optional[str], Optional[PaperAnalysis]]:
+        """返回缓存键和缓存的分析结果（未启用缓存时均为 None）"""
+        if cache is None:
+            return None, None
+        cache_key = analyzer.cache_key(paper, zotero_data_dir)
+        cached = cache.get(cache_key)
+        return cache_key, cached
+    
+    def store(cache_key: Optional[str], analysis: PaperAnalysis):
+        # 失败的分析不缓存，下次运行时重试
+        if cache_key is not None and not analysis.error_message:
+            cache.set(cache_key, analysis)
+    
+    # 逐篇分析的文献先查缓存：命中的直接使用缓存结果，只有未命中的文献才预取 PDF 和发起请求
+    single_keys: Dict[int, Optional[str]] = {}
+    cached_count = 0
+    if cache is not None:
+        misses = []
+        for i in single_indices:
+            cache_key, cached = get_cached(papers[i])
+            if cached is not None:
+                analyses[i] = cached
+                cached_count += 1
+            else:
+                misses.append(i)
+                single_keys[i] = cache_key
+        single_indices = misses
+        if cached_count:
+            logger.info(f"{cached_count} 篇文献命中分析结果缓存")
+    
+    def analyze_one(n: int) -> List[PaperAnalysis]:
+        i = single_indices[n]
+        paper = papers[i]
+        with prefetch_lock:
+            prefetch(n)
+            pdf_future = prefetched.pop(n)
+            prefetch(n + workers)
+        
+        try:
+            full_text = pdf_future.result()
+        except Exception as e:
+            logger.warning(f"预取 PDF 全文失败，分析时重新提取: {paper.get('title', 'Unknown')}: {e}")
+            full_text = None
+        
+        # 按发送文本长度粗略估计 token 消耗（约 4 个字符一个 token），取得配额后再发起请求
+        rate_limiter.acquire(len(full_text or paper.get('abstractNote') or '') // 4)
+        analysis = analyzer.analyze_paper(paper, zotero_data_dir, full_text=full_text)
+        store(single_keys.get(i), analysis)
+        return [analysis]
+    
+    def analyze_chunk(indices: List[int]) -> List[PaperAnalysis]:
+        results: Dict[int, PaperAnalysis] = {}
+        pending = []
+        for i in indices:
+            cache_key, cached = get_cached(papers[i])
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append((i, cache_key))
+        
+        if pending:
+            chunk = [papers[i] for i, _ in pending]
+            rate_limiter.acquire(sum(len(paper['abstractNote']) for paper in chunk) // 4)
             try:
-                # 分析单篇文献
-                analysis = analyzer.analyze_paper(paper, zotero_data_dir)
-                analyses.append(analysis)
-                
-                # 更新进度条
-                title = paper.get('title', 'Unknown')
-                pbar.set_description(f"已完成: {title[:50]}...")
-                pbar.update(1)
-                
-                # API 调用间隔
-                if config.delay > 0:
-                    time.sleep(config.delay)
+                chunk_analyses = analyzer.analyze_papers_bulk(chunk)
+            except Exception as e:
+                # 合并请求失败（如响应篇数不符），只对这一组改为逐篇分析
+                logger.warning(f"合并分析 {len(chunk)} 篇文献失败，改为逐篇分析: {e}")
+                chunk_analyses = []
+                for paper in chunk:
+                    rate_limiter.acquire(len(paper['abstractNote']) // 4)
+                    chunk_analyses.append(analyzer.analyze_paper(paper, zotero_data_dir, full_text=""))
+            
+            for (i, cache_key), analysis in zip(pending, chunk_analyses):
+                store(cache_key, analysis)
+                results[i] = analysis
+        
+        return [results[i] for i in indices]
+    
+    # 每次分析都阻塞在远程 API 请求上，用线程池并发发起请求；每个任务对应一篇或一组文献，
+    # 各线程的请求都在分析器共享的事件循环中发出，复用同一个客户端的连接池
+    executor = ThreadPoolExecutor(max_workers=workers)
+    futures = {executor.submit(analyze_one, n): [i] for n, i in enumerate(single_indices)}
+    for start in range(0, len(bulk_indices), max(1, config.bulk_size)):
+        indices = bulk_indices[start:start + config.bulk_size]
+        futures[executor.submit(analyze_chunk, indices)] = indices
+    
+    try:
+        # 进度条只在主线程中更新，限制刷新频率，避免每篇都重绘终端
+        with tqdm(total=total_papers, initial=cached_count, desc="分析进度", mininterval=0.5, smoothing=0.1) as pbar:
+            for future in as_completed(futures):
+                indices = futures[future]
+                try:
+                    for i, analysis in zip(indices, future.result()):
+                        analyses[i] = analysis
+                        if analysis.error_message:
+                            failed_count += 1
                     
-            except KeyboardInterrupt:
-                logger.warning("用户中断，正在保存已分析的结果...")
-                return analyses
+                    # 更新进度条（不立即刷新，随 update 按 mininterval 刷新）
+                    pbar.set_postfix_str(papers[indices[-1]].get('title', 'Unknown')[:40], refresh=False)
+                    
+                except Exception as e:
+                    error_message = str(e)
+                    failed_count += len(indices)
+                    for i in indices:
+                        paper = papers[i]
+                        title = paper.get('title') or '未知标题'
+                        logger.error(f"分析文献失败: {title}: {error_message}")
+                        # 创建错误分析结果
+                        analyses[i] = PaperAnalysis(
+                            title=title,
+                            authors=_authors(paper),
+                            abstract=paper.get('abstractNote', ''),
+                            innovation_points=f"分析失败: {error_message}",
+                            summary=f"分析失败: {error_message}",
+                            error_message=error_message
+                        )
                 
-            except Exception as e:
-                logger.error(f"分析文献失败: {paper.get('title', 'Unknown')}: {e}")
-                # 创建错误分析结果
-                error_analysis = PaperAnalysis(
-                    title=paper.get('title', '未知标题'),
-                    authors='; '.join([c.get('name', '') for c in paper.get('creators', [])]),
-                    abstract=paper.get('abstractNote', ''),
-                    innovation_points=f"分析失败: {str(e)}",
-                    summary=f"分析失败: {str(e)}",
-                    original_abstract=paper.get('abstractNote', ''),
-                    error_message=str(e)
-                )
-                analyses.append(error_analysis)
-                pbar.update(1)
+                pbar.update(len(indices))
                 
-                # 继续处理下一篇
-                continue
+    except KeyboardInterrupt:
+        logger.warning("用户中断，正在保存已分析的结果...")
+        executor.shutdown(wait=False, cancel_futures=True)
+        return [analysis for analysis in analyses if analysis is not None], failed_count
+    
+    executor.shutdown()
     
     logger.success(f"批量分析完成，共处理 {len(analyses)} 篇文献")
-    return analyses
+    return analyses, failed_count
 
 
-def get_papers_from_config(config: AnalyzerConfig, interactive_collection: bool = False) -> List[Dict]:
+def iter_papers_from_config(config: AnalyzerConfig, interactive_collection: bool = False) -> Generator[Dict, None, None]:
     """
-    根据配置获取文献列表
+    根据配置获取文献
+    
+    数据库检测和集合选择立即进行；从数据库读取的文献逐篇返回，可直接交给 filter_papers 边读边过滤
     
     Args:
         config: 分析器配置
         interactive_collection: 是否使用交互式集合选择
         
     Returns:
-        文献列表
+        文献生成器（调用方读取完毕后应 close()，提前停止读取时立即释放数据库游标和连接）
     """
     # 确定数据库路径
     database_path = config.database_path
@@ -177,7 +362,7 @@ def get_papers_from_config(config: AnalyzerConfig, interactive_collection: bool
     if not database_path:
         # 自动检测 Zotero 数据库
         try:
-            reader = LocalZoteroReader()
+            reader = _get_reader()
             database_path = reader.database_path
             logger.info(f"自动检测到 Zotero 数据库: {database_path}")
         except Exception as e:
@@ -188,29 +373,29 @@ def get_papers_from_config(config: AnalyzerConfig, interactive_collection: bool
     if interactive_collection or config.selected_collections:
         if interactive_collection:
             # 交互式选择集合
+            from selector import select_collections_interactive
             selected_keys, papers = select_collections_interactive(database_path)
             
             # 更新配置中的选择集合
             config.selected_collections = selected_keys
-            config_manager = ConfigManager()
+            config_manager = get_config_manager()
             config_manager.save_recent_config(config)
-            
-        else:
-            # 使用配置中的集合
-            from selector import CollectionManager
-            collection_manager = CollectionManager(database_path)
-            papers = collection_manager.get_collection_items(config.selected_collections)
-            logger.info(f"从配置的集合中加载了 {len(papers)} 篇文献")
-    else:
-        # 读取所有文献
-        papers = get_local_zotero_items(database_path)
-        logger.info(f"读取了所有 {len(papers)} 篇文献")
-    
-    return papers
+            # 与其他分支一样返回生成器，调用方可统一关闭
+            return (paper for paper in papers)
+        
+        # 使用配置中的集合
+        collection_manager = _get_collection_manager(database_path)
+        logger.info(f"从配置的 {len(config.selected_collections)} 个集合中读取文献")
+        return collection_manager.iter_collection_items(config.selected_collections)
+    
+    # 读取所有文献
+    from zotero_reader import iter_local_zotero_items
+    logger.info("读取所有文献")
+    return iter_local_zotero_items(database_path)
 
 
-def main():
-    """主函数"""
+def _build_arg_parser() -> argparse.ArgumentParser:
+    """构造命令行参数解析器"""
     parser = argparse.ArgumentParser(
         description="Zotero 本地文献分析器（增强版）",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -323,10 +508,32 @@ def main():
         nargs='+',
         help='排除关键词（覆盖配置）'
     )
+    process_group.add_argument(
+        '--concurrency',
+        type=int,
+        help='同时进行的 API 请求数（覆盖配置）'
+    )
+    process_group.add_argument(
+        '--bulk-size',
+        type=int,
+        choices=range(1, MAX_BULK_SIZE + 1),
+        metavar='N',
+        help=f'只有摘要的文献每次请求合并分析的篇数，1-{MAX_BULK_SIZE}（覆盖配置）'
+    )
     process_group.add_argument(
         '--delay',
         type=float,
-        help='API 调用间隔秒数（覆盖配置）'
+        help='API 调用间隔秒数，未设置 --rpm 时换算为每分钟请求数（覆盖配置）'
+    )
+    process_group.add_argument(
+        '--rpm',
+        type=int,
+        help='每分钟最大请求数（覆盖配置）'
+    )
+    process_group.add_argument(
+        '--tpm',
+        type=int,
+        help='每分钟最大 token 数（覆盖配置）'
     )
     
     # 输出配置参数
@@ -341,6 +548,11 @@ def main():
         action='store_true',
         help='导出详细报告（覆盖配置）'
     )
+    output_group.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='不使用分析结果缓存，全部重新分析'
+    )
     output_group.add_argument(
         '--no-export-statistics',
         action='store_true',
@@ -361,10 +573,20 @@ def main():
         help='日志级别'
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+def _parse_args() -> argparse.Namespace:
+    """解析命令行参数"""
+    return _build_arg_parser().parse_args()
+
+
+def main():
+    """主函数"""
+    args = _parse_args()
     
     # 初始化配置管理器
-    config_manager = ConfigManager()
+    config_manager = get_config_manager()
     
     # 处理配置管理命令
     if args.config_wizard:
@@ -424,84 +646,97 @@ def main():
         config.include_types = args.include_types
     if args.exclude_keywords:
         config.exclude_keywords = args.exclude_keywords
+    if args.concurrency is not None:
+        config.concurrency = args.concurrency
+    if args.bulk_size is not None:
+        config.bulk_size = args.bulk_size
     if args.delay is not None:
         config.delay = args.delay
+    if args.rpm is not None:
+        config.rpm = args.rpm
+    if args.tpm is not None:
+        config.tpm = args.tpm
     if args.output_dir:
         config.output_dir = args.output_dir
     if args.export_detailed:
         config.export_detailed = True
     if args.no_export_statistics:
         config.export_statistics = False
+    if args.no_cache:
+        config.use_cache = False
     if args.debug:
         config.debug = True
     if args.log_level:
         config.log_level = args.log_level
     
-    # 设置日志
-    setup_logger(config)
-    
-    # 检查 API 密钥
+    # 检查 API 密钥（在设置日志和读取数据库之前，缺少密钥时尽早退出）
     if not config.api_key:
         api_key = os.environ.get('OPENAI_API_KEY')
         if api_key:
             config.api_key = api_key
         else:
-            logger.error("未找到 API 密钥！")
-            print("请通过以下方式之一提供 API 密钥：")
-            print("1. 运行配置向导: python zotero_analyzer_enhanced.py --config-wizard")
-            print("2. 使用命令行参数: --api-key YOUR_KEY")
-            print("3. 设置环境变量: export OPENAI_API_KEY=YOUR_KEY")
+            print("❌ 未找到 API 密钥！", file=sys.stderr)
+            print("请通过以下方式之一提供 API 密钥：", file=sys.stderr)
+            print("1. 运行配置向导: python zotero_analyzer_enhanced.py --config-wizard", file=sys.stderr)
+            print("2. 使用命令行参数: --api-key YOUR_KEY", file=sys.stderr)
+            print("3. 设置环境变量: export OPENAI_API_KEY=YOUR_KEY", file=sys.stderr)
             sys.exit(1)
     
+    # 设置日志
+    setup_logger(config)
+    
     try:
         # 1. 获取文献数据
         logger.info("开始获取文献数据...")
-        papers = get_papers_from_config(config, args.select_collections)
-        
-        if not papers:
-            logger.error("未找到任何文献，请检查数据库路径或集合选择")
-            sys.exit(1)
-        
-        logger.info(f"成功获取 {len(papers)} 篇文献")
-        
-        # 2. 过滤文献
-        filtered_papers = filter_papers(papers, config)
+        # 2. 边读取边过滤文献，不同时保留原始和过滤后的文献列表；
+        # 过滤结束后立即关闭生成器（达到数量限制时它停在中途，否则会持有数据库游标直到程序退出）
+        with closing(iter_papers_from_config(config, args.select_collections)) as papers:
+            filtered_papers = filter_papers(papers, config)
         
         if not filtered_papers:
-            logger.error("过滤后没有文献需要处理")
+            logger.error("没有文献需要处理，请检查数据库路径、集合选择或过滤条件")
             sys.exit(1)
         
         logger.info(f"过滤后需要处理 {len(filtered_papers)} 篇文献")
         
         # 3. 初始化分析器
         logger.info("初始化文献分析器...")
+        from analyzer import PaperAnalyzer
+        from exporter import CSVExporter
+        from rate_limiter import RateLimiter
+        rate_limiter = RateLimiter.from_config(config)
         analyzer = PaperAnalyzer(
             api_key=config.api_key,
             base_url=config.base_url,
             model=config.model,
             language=config.language,
             max_pages=config.max_pages,
-            max_tokens=config.max_tokens
+            max_tokens=config.max_tokens,
+            on_rate_limit=rate_limiter.on_rate_limit
         )
         
         # 4. 获取 Zotero 数据目录
         zotero_data_dir = None
         if config.database_path:
-            zotero_data_dir = str(Path(config.database_path).parent)
+            zotero_data_dir = os.path.dirname(config.database_path) or os.curdir
         else:
             try:
-                reader = LocalZoteroReader()
-                zotero_data_dir = str(Path(reader.database_path).parent)
+                reader = _get_reader()
+                zotero_data_dir = os.path.dirname(reader.database_path) or os.curdir
             except Exception:
                 logger.warning("无法确定 Zotero 数据目录，PDF 附件可能无法读取")
         
-        # 5. 批量分析文献
-        analyses = analyze_papers_batch(
-            filtered_papers,
-            analyzer,
-            config,
-            zotero_data_dir=zotero_data_dir
-        )
+        # 5. 批量分析文献（所有分析共用分析器的事件循环和 API 客户端，结束后关闭）
+        try:
+            analyses, failed_count = analyze_papers_batch(
+                filtered_papers,
+                analyzer,
+                config,
+                zotero_data_dir=zotero_data_dir,
+                rate_limiter=rate_limiter
+            )
+        finally:
+            analyzer.close()
         
         if not analyses:
             logger.error("没有成功分析任何文献")
@@ -510,11 +745,11 @@ def main():
         # 6. 导出结果
         logger.info("开始导出分析结果...")
         
-        # 确保输出目录存在
-        output_dir = Path(config.output_dir)
-        output_dir.mkdir(parents=True, exist_ok=True)
+        # 确保输出目录存在（直接使用字符串路径，无需构造 Path 对象）
+        output_dir = config.output_dir
+        os.makedirs(output_dir, exist_ok=True)
         
-        exporter = CSVExporter(str(output_dir))
+        exporter = CSVExporter(output_dir)
         exported_files = []
         
         # 导出基本分析结果
@@ -535,8 +770,7 @@ def main():
         config_manager.save_recent_config(config)
         
         # 8. 显示结果统计
-        successful_count = sum(1 for a in analyses if not a.error_message)
-        failed_count = len(analyses) - successful_count
+        successful_count = len(analyses) - failed_count
         
         logger.success("=" * 60)
         logger.success("分析完成！")
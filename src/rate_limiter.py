@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Optional
+from loguru import logger
+
+
+class RateLimiter:
+    """
+    令牌桶限流器（线程安全）
+
+    同时按每分钟请求数（RPM）和每分钟 token 数（TPM）限流：请求桶和 token 桶
+    按速率连续补充，容量为一秒的配额，请求在两个桶都足够时才放行。
+    超过 token 桶容量的大请求在桶满时放行并按全部 token 数扣减，余额变为负数（欠账），
+    之后的请求等待欠账补足后才放行，因此长期速率不超过 TPM。
+    收到限流响应（429）时把补充速率减半，一段时间内没有再次限流则恢复（AIMD）。
+    """
+
+    # 连续限流时速率最多降到原来的 1/16
+    _MIN_FACTOR = 1 / 16
+
+    def __init__(self, rpm: Optional[float] = None, tpm: Optional[float] = None,
+                 cooldown: float = 30.0):
+        """
+        初始化限流器
+
+        Args:
+            rpm: 每分钟最大请求数，为 None 时不限制请求数
+            tpm: 每分钟最大 token 数，为 None 时不限制 token 数
+            cooldown: 限流降速的持续秒数
+        """
+        self._req_rate = rpm / 60 if rpm else 0.0
+        self._tok_rate = tpm / 60 if tpm else 0.0
+        # 桶容量为一秒的配额，请求桶至少能容纳一个请求
+        self._req_capacity = max(1.0, self._req_rate)
+        self._tok_capacity = max(1.0, self._tok_rate)
+        self._req_level = self._req_capacity
+        self._tok_level = self._tok_capacity
+        self._cooldown = cooldown
+        self._factor = 1.0
+        self._slow_until = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        logger.info(f"初始化限流器: RPM={rpm or '不限'}, TPM={tpm or '不限'}")
+
+    @classmethod
+    def from_config(cls, config) -> "RateLimiter":
+        """
+        根据分析器配置创建限流器
+
+        未设置 rpm 时由旧的 delay（调用间隔秒数）换算，即 rpm = 60 / delay
+        """
+        rpm = config.rpm
+        if not rpm and config.delay > 0:
+            rpm = 60 / config.delay
+        return cls(rpm=rpm, tpm=config.tpm)
+
+    def _refill(self, now: float):
+        """按经过的时间补充两个桶（调用方需持有锁）"""
+        if self._factor < 1.0 and now >= self._slow_until:
+            self._factor = 1.0
+            logger.info("限流降速结束，恢复原速率")
+
+        elapsed = now - self._updated
+        self._updated = now
+        self._req_level = min(self._req_capacity, self._req_level + elapsed * self._req_rate * self._factor)
+        self._tok_level = min(self._tok_capacity, self._tok_level + elapsed * self._tok_rate * self._factor)
+
+    def acquire(self, n_tokens: int = 0):
+        """
+        阻塞直到可以发出一个请求
+
+        Args:
+            n_tokens: 该请求预计消耗的 token 数（超过桶容量时等桶满后放行，并按全部 token 数扣减）
+        """
+        n_tokens = n_tokens if self._tok_rate else 0
+        # 放行所需的 token 余额最多为桶容量，超出部分作为欠账由之后的补充偿还
+        tok_needed = min(n_tokens, self._tok_capacity)
+        need_req = 1.0 if self._req_rate else 0.0
+
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+
+                req_short = need_req - self._req_level
+                tok_short = tok_needed - self._tok_level
+                if req_short <= 0 and tok_short <= 0:
+                    self._req_level -= need_req
+                    self._tok_level -= n_tokens
+                    return
+
+                # 计算补足两个桶所需的时间
+                wait = 0.0
+                if req_short > 0:
+                    wait = req_short / (self._req_rate * self._factor)
+                if tok_short > 0:
+                    wait = max(wait, tok_short / (self._tok_rate * self._factor))
+
+            # 在锁外等待，不阻塞其他线程补充和检查
+            time.sleep(wait)
+
+    def on_rate_limit(self):
+        """收到限流响应时调用：补充速率减半，cooldown 秒内无新的限流则恢复"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._factor = max(self._MIN_FACTOR, self._factor / 2)
+            self._slow_until = now + self._cooldown
+            logger.warning(f"收到限流响应，请求速率降为原来的 {self._factor:g} 倍，持续 {self._cooldown:g} 秒")
@@ -6,11 +6,18 @@ Zotero 集合选择模块
 支持层级集合显示、多选、搜索过滤等功能。
 """
 
-import sqlite3
+import hashlib
+import os
+import pickle
+from collections import Counter, deque
 from pathlib import Path
-from typing import List, Dict, Set, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from dataclasses import dataclass
 from loguru import logger
+from .zotero_reader import LocalZoteroReader, connect_database
+
+# 集合索引缓存目录（与 PDF 文本缓存相同），数据库文件未变化时跳过集合查询
+_COLLECTIONS_CACHE_DIR = Path.home() / ".cache" / "zotero-llm"
 
 
 @dataclass
@@ -31,6 +38,13 @@ class ZoteroCollection:
 class CollectionManager:
     """集合管理器"""
     
+    # 缓存到磁盘的加载结果；数据结构变化时递增版本号，使旧缓存失效
+    _CACHED_ATTRS = (
+        'collections', 'root_collections', '_excluded_type_ids',
+        '_lower_names', '_collection_tree', '_all_collections'
+    )
+    _CACHE_VERSION = 1
+    
     def __init__(self, database_path: str):
         """
         初始化集合管理器
@@ -39,234 +53,309 @@ class CollectionManager:
             database_path: Zotero 数据库路径
         """
         self.database_path = database_path
-        self.collections = {}  # key -> ZoteroCollection
-        self.root_collections = []  # 顶级集合列表
+        self.collections: Dict[str, ZoteroCollection] = {}  # key -> ZoteroCollection
+        self.root_collections: List[ZoteroCollection] = []  # 顶级集合列表
+        self._path_cache: Dict[str, str] = {}  # key -> 集合完整路径
+        self._reader: Optional[LocalZoteroReader] = None
         
         if not Path(database_path).exists():
             raise FileNotFoundError(f"Zotero 数据库文件不存在: {database_path}")
         
-        self._load_collections()
+        # 整个生命周期复用同一个只读连接，页缓存在多次查询之间保持有效
+        self._conn = connect_database(database_path)
+        
+        # 数据库文件未变化时直接使用上次加载的集合索引
+        if not self._load_cached_collections():
+            self._load_collections()
+            self._save_cached_collections()
         logger.info(f"加载了 {len(self.collections)} 个集合")
     
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
     def _load_collections(self):
         """从数据库加载集合信息"""
-        conn = sqlite3.connect(self.database_path)
-        conn.row_factory = sqlite3.Row
+        cursor = self._conn.cursor()
+        
+        # 笔记和附件的类型 ID 对同一个数据库固定不变，只查询一次，之后作为参数传入各查询
+        cursor.execute("SELECT itemTypeID FROM itemTypes WHERE typeName IN ('note', 'attachment')")
+        self._excluded_type_ids = tuple(row[0] for row in cursor)
+        
+        # 统计每个集合的直接文献数量（不计笔记和附件）：一次顺序扫描在 Python 中去重计数，
+        # 不让 SQLite 做 DISTINCT 和 GROUP BY；条目已不存在的集合记录仍计入
+        cursor.execute("""
+        SELECT ci.collectionID, ci.itemID, i.itemTypeID
+        FROM collectionItems ci
+        LEFT JOIN items i ON ci.itemID = i.itemID
+        """)
+        excluded_type_ids = frozenset(self._excluded_type_ids)
+        collection_items = {
+            (collection_id, item_id) for collection_id, item_id, type_id in cursor
+            if type_id not in excluded_type_ids
+        }
+        item_counts = Counter(collection_id for collection_id, _ in collection_items)
+        
+        # 获取所有集合
+        query = """
+        SELECT 
+            c.collectionID,
+            c.key,
+            c.collectionName as name,
+            c.parentCollectionID,
+            pc.key as parent_key
+        FROM collections c
+        LEFT JOIN collections pc ON c.parentCollectionID = pc.collectionID
+        ORDER BY c.collectionName
+        """
+        
+        cursor.execute(query)
         
+        # 创建集合对象（直接迭代游标，不先取出全部结果）
+        for collection_id, key, name, _, parent_key in cursor:
+            collection = ZoteroCollection(
+                key=key,
+                name=name,
+                parent_key=parent_key,
+                item_count=item_counts[collection_id]
+            )
+            self.collections[collection.key] = collection
+        
+        # 构建层级关系
+        self._build_hierarchy()
+    
+    def _collections_cache(self) -> Tuple[Path, tuple]:
+        """返回集合索引缓存文件路径和有效性标记（数据库文件的修改时间和大小）"""
+        database_path = Path(self.database_path).resolve()
+        stat = database_path.stat()
+        key = hashlib.sha1(str(database_path).encode('utf-8')).hexdigest()
+        return _COLLECTIONS_CACHE_DIR / f"collections_{key}.pkl", (self._CACHE_VERSION, stat.st_mtime_ns, stat.st_size)
+    
+    def _load_cached_collections(self) -> bool:
+        """从磁盘缓存恢复集合索引，缓存不存在、已过期或损坏时返回 False"""
         try:
-            cursor = conn.cursor()
-            
-            # 获取所有集合
-            query = """
-            SELECT 
-                c.key,
-                c.collectionName as name,
-                c.parentCollectionID,
-                pc.key as parent_key
-            FROM collections c
-            LEFT JOIN collections pc ON c.parentCollectionID = pc.collectionID
-            ORDER BY c.collectionName
-            """
-            
-            cursor.execute(query)
-            collection_rows = cursor.fetchall()
-            
-            # 创建集合对象
-            for row in collection_rows:
-                collection = ZoteroCollection(
-                    key=row['key'],
-                    name=row['name'],
-                    parent_key=row['parent_key']
-                )
-                self.collections[collection.key] = collection
-            
-            # 构建层级关系
-            self._build_hierarchy()
-            
-            # 计算每个集合的文献数量
-            self._count_items_in_collections(cursor)
+            cache_file, meta = self._collections_cache()
+            with open(cache_file, 'rb') as f:
+                state = pickle.load(f)
+            if state.get('meta') != meta:
+                return False
+            for name in self._CACHED_ATTRS:
+                setattr(self, name, state[name])
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.debug(f"读取集合索引缓存失败: {e}")
+            return False
+        
+        logger.debug("使用缓存的集合索引")
+        return True
+    
+    def _save_cached_collections(self):
+        """把加载的集合索引写入磁盘缓存"""
+        try:
+            cache_file, meta = self._collections_cache()
+            state = {name: getattr(self, name) for name in self._CACHED_ATTRS}
+            state['meta'] = meta
             
-        finally:
-            conn.close()
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # 先写临时文件再替换，避免并发运行时读到不完整的缓存
+            tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            logger.debug(f"写入集合索引缓存失败: {e}")
+    
+    def _excluded_type_placeholders(self) -> str:
+        """笔记和附件类型 ID 的 IN 子句占位符"""
+        return ','.join('?' * len(self._excluded_type_ids))
     
     def _build_hierarchy(self):
         """构建集合层级关系"""
+        # 先整体按名称排序一次，按此顺序追加的顶级集合和子集合列表自然有序
+        ordered = sorted(self.collections.values(), key=lambda x: x.name)
+        
         # 找出所有顶级集合和构建父子关系
-        for collection in self.collections.values():
+        for collection in ordered:
             if collection.parent_key is None:
                 self.root_collections.append(collection)
-                collection.level = 0
             else:
                 parent = self.collections.get(collection.parent_key)
                 if parent:
                     parent.children.append(collection)
-                    collection.level = parent.level + 1
         
-        # 按名称排序
-        self.root_collections.sort(key=lambda x: x.name)
-        for collection in self.collections.values():
-            collection.children.sort(key=lambda x: x.name)
-    
-    def _count_items_in_collections(self, cursor):
-        """计算每个集合中的文献数量"""
-        # 获取每个集合的直接文献数量
-        query = """
-        SELECT 
-            c.key,
-            COUNT(DISTINCT ci.itemID) as item_count
-        FROM collections c
-        LEFT JOIN collectionItems ci ON c.collectionID = ci.collectionID
-        LEFT JOIN items i ON ci.itemID = i.itemID
-        WHERE i.itemTypeID NOT IN (
-            SELECT itemTypeID FROM itemTypes 
-            WHERE typeName IN ('note', 'attachment')
-        ) OR i.itemID IS NULL
-        GROUP BY c.collectionID, c.key
-        """
+        # 从顶级集合开始广度优先设置层级，父集合的层级总是先于子集合确定
+        queue = deque((collection, 0) for collection in self.root_collections)
+        while queue:
+            collection, level = queue.popleft()
+            collection.level = level
+            queue.extend((child, level + 1) for child in collection.children)
         
-        cursor.execute(query)
+        # 搜索用的名称索引：预先转为小写并按名称排序，搜索时无需重复转换和排序
+        self._lower_names = [(collection.name.lower(), collection) for collection in ordered]
         
-        for row in cursor.fetchall():
-            collection_key = row['key']
-            item_count = row['item_count']
-            
-            if collection_key in self.collections:
-                self.collections[collection_key].item_count = item_count
+        # 集合树和平铺列表加载后不再变化，缓存为元组，每次获取时不再复制
+        self._collection_tree = tuple(self.root_collections)
+        self._all_collections = tuple(self.collections.values())
     
-    def get_collection_tree(self) -> List[ZoteroCollection]:
-        """获取集合树结构"""
-        return self.root_collections
+    def get_collection_tree(self) -> Tuple[ZoteroCollection, ...]:
+        """获取集合树结构（顶级集合元组，不可修改）"""
+        return self._collection_tree
     
-    def get_all_collections(self) -> List[ZoteroCollection]:
-        """获取所有集合的平铺列表"""
-        return list(self.collections.values())
+    def get_all_collections(self) -> Tuple[ZoteroCollection, ...]:
+        """获取所有集合的平铺列表（元组，不可修改）"""
+        return self._all_collections
     
     def find_collections(self, search_term: str) -> List[ZoteroCollection]:
         """搜索集合"""
         search_term = search_term.lower()
-        results = []
-        
-        for collection in self.collections.values():
-            if search_term in collection.name.lower():
-                results.append(collection)
-        
-        return sorted(results, key=lambda x: x.name)
+        return [collection for lower_name, collection in self._lower_names if search_term in lower_name]
     
     def get_item_collection_paths(self, item_key: str) -> List[str]:
         """获取文献所属的所有集合路径"""
-        conn = sqlite3.connect(self.database_path)
+        cursor = self._conn.cursor()
         
-        try:
-            cursor = conn.cursor()
-            
-            # 查找文献所属的集合
-            query = """
-            SELECT c.key as collection_key
-            FROM items i
-            JOIN collectionItems ci ON i.itemID = ci.itemID
-            JOIN collections c ON ci.collectionID = c.collectionID
-            WHERE i.key = ?
-            """
-            
-            cursor.execute(query, (item_key,))
-            collection_keys = [row[0] for row in cursor.fetchall()]
-            
-            # 获取每个集合的完整路径
-            collection_paths = []
-            for collection_key in collection_keys:
-                path = self.get_collection_path(collection_key)
-                if path:
-                    collection_paths.append(path)
-            
-            return collection_paths
-            
-        finally:
-            conn.close()
+        # 查找文献所属的集合
+        query = """
+        SELECT c.key as collection_key
+        FROM items i
+        JOIN collectionItems ci ON i.itemID = ci.itemID
+        JOIN collections c ON ci.collectionID = c.collectionID
+        WHERE i.key = ?
+        """
+        
+        cursor.execute(query, (item_key,))
+        
+        # 获取每个集合的完整路径
+        collection_paths = []
+        for (collection_key,) in cursor:
+            path = self.get_collection_path(collection_key)
+            if path:
+                collection_paths.append(path)
+        
+        return collection_paths
 
+    def get_all_item_collection_paths(self) -> Dict[str, List[str]]:
+        """
+        一次查询获取所有文献所属的集合路径
+        
+        Returns:
+            文献 key 到集合路径列表的映射，不属于任何集合的文献不在其中
+        """
+        cursor = self._conn.cursor()
+        
+        query = """
+        SELECT i.key as item_key, c.key as collection_key
+        FROM collectionItems ci
+        JOIN items i ON ci.itemID = i.itemID
+        JOIN collections c ON ci.collectionID = c.collectionID
+        """
+        
+        cursor.execute(query)
+        
+        item_paths = {}
+        for item_key, collection_key in cursor:
+            path = self.get_collection_path(collection_key)
+            if path:
+                item_paths.setdefault(item_key, []).append(path)
+        
+        return item_paths
+    
     def get_collection_path(self, collection_key: str) -> str:
-        """获取集合的完整路径"""
+        """获取集合的完整路径（按集合缓存，每个集合的路径只拼接一次）"""
+        path = self._path_cache.get(collection_key)
+        if path is not None:
+            return path
+        
         collection = self.collections.get(collection_key)
         if not collection:
             return ""
         
-        path_parts = [collection.name]
-        current = collection
+        # 复用父集合已缓存的路径
+        parent_path = self.get_collection_path(collection.parent_key) if collection.parent_key else ""
+        path = f"{parent_path} / {collection.name}" if parent_path else collection.name
         
-        while current.parent_key:
-            parent = self.collections.get(current.parent_key)
-            if parent:
-                path_parts.insert(0, parent.name)
-                current = parent
-            else:
-                break
+        self._path_cache[collection_key] = path
+        return path
+    
+    def _get_reader(self) -> LocalZoteroReader:
+        """获取条目读取器（每个集合管理器只创建一次，只用于复用其批量查询方法，查询使用本连接的游标）"""
+        if self._reader is None:
+            self._reader = LocalZoteroReader(self.database_path)
+        return self._reader
+    
+    def count_unique_items(self, collection_keys: List[str]) -> int:
+        """
+        统计多个集合中去重后的文献数量（不计笔记和附件，与 get_collection_items 一致）
+        
+        Args:
+            collection_keys: 集合 key 列表
+            
+        Returns:
+            去重后的文献数量
+        """
+        if not collection_keys:
+            return 0
+        
+        placeholders = ','.join('?' * len(collection_keys))
+        query = f"""
+        SELECT COUNT(DISTINCT i.itemID)
+        FROM items i
+        JOIN collectionItems ci ON i.itemID = ci.itemID
+        JOIN collections c ON ci.collectionID = c.collectionID
+        WHERE c.key IN ({placeholders})
+        AND i.itemTypeID NOT IN ({self._excluded_type_placeholders()})
+        """
         
-        return " / ".join(path_parts)
+        return self._conn.execute(query, [*collection_keys, *self._excluded_type_ids]).fetchone()[0]
     
     def get_collection_items(self, collection_keys: List[str]) -> List[Dict]:
         """获取指定集合中的所有文献"""
+        return list(self.iter_collection_items(collection_keys))
+    
+    def iter_collection_items(self, collection_keys: List[str]) -> Iterator[Dict]:
+        """逐篇读取指定集合中的文献（生成器，不在内存中保留整个文献列表）"""
         if not collection_keys:
-            return []
+            return
         
-        conn = sqlite3.connect(self.database_path)
-        conn.row_factory = sqlite3.Row
+        # 条目列表逐行读取，详细数据查询使用另一个游标
+        cursor = self._conn.cursor()
+        
+        # 构建 IN 子句的占位符
+        placeholders = ','.join(['?' for _ in collection_keys])
+        
+        query = f"""
+        SELECT DISTINCT
+            i.itemID,
+            i.itemTypeID,
+            it.typeName,
+            i.dateAdded,
+            i.dateModified,
+            i.key
+        FROM items i
+        JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
+        JOIN collectionItems ci ON i.itemID = ci.itemID
+        JOIN collections c ON ci.collectionID = c.collectionID
+        WHERE c.key IN ({placeholders})
+        AND i.itemTypeID NOT IN ({self._excluded_type_placeholders()})
+        ORDER BY i.dateAdded DESC
+        """
         
-        try:
-            cursor = conn.cursor()
-            
-            # 构建 IN 子句的占位符
-            placeholders = ','.join(['?' for _ in collection_keys])
-            
-            query = f"""
-            SELECT DISTINCT
-                i.itemID,
-                i.itemTypeID,
-                it.typeName,
-                i.dateAdded,
-                i.dateModified,
-                i.key
-            FROM items i
-            JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
-            JOIN collectionItems ci ON i.itemID = ci.itemID
-            JOIN collections c ON ci.collectionID = c.collectionID
-            WHERE c.key IN ({placeholders})
-            AND i.itemTypeID NOT IN (
-                SELECT itemTypeID FROM itemTypes 
-                WHERE typeName IN ('note', 'attachment')
-            )
-            ORDER BY i.dateAdded DESC
-            """
-            
-            cursor.execute(query, collection_keys)
-            items = []
-            
-            for row in cursor.fetchall():
-                item = dict(row)
-                
-                # 获取条目的详细数据（使用原有的方法）
-                from .zotero_reader import LocalZoteroReader
-                reader = LocalZoteroReader(self.database_path)
-                item_data = reader._get_item_data(cursor, item['itemID'])
-                item.update(item_data)
-                
-                # 获取创作者信息
-                item['creators'] = reader._get_item_creators(cursor, item['itemID'])
-                
-                # 获取标签
-                item['tags'] = reader._get_item_tags(cursor, item['itemID'])
-                
-                # 获取附件
-                item['attachments'] = reader._get_item_attachments(cursor, item['itemID'])
-                
-                # 获取笔记
-                item['notes'] = reader._get_item_notes(cursor, item['itemID'])
-                
-                items.append(item)
-            
-            logger.info(f"从 {len(collection_keys)} 个集合中获取了 {len(items)} 篇文献")
-            return items
-            
-        finally:
-            conn.close()
+        reader = self._get_reader()
+        
+        item_count = 0
+        rows = self._conn.execute(query, [*collection_keys, *self._excluded_type_ids])
+        for item in reader._iter_items_with_details(cursor, rows):
+            item_count += 1
+            yield item
+        
+        logger.info(f"从 {len(collection_keys)} 个集合中获取了 {item_count} 篇文献")
 
 
 class CollectionSelector:
@@ -365,10 +454,11 @@ class CollectionSelector:
                 new_selections = set()
                 
                 for index in indices:
-                    if index in collection_map:
-                        new_selections.add(collection_map[index])
-                    else:
+                    collection_key = collection_map.get(index)
+                    if collection_key is None:
                         print(f"⚠️ 忽略无效编号: {index}")
+                    else:
+                        new_selections.add(collection_key)
                 
                 if new_selections:
                     self.selected_collections.update(new_selections)
@@ -429,15 +519,15 @@ class CollectionSelector:
         print(f"\n📋 已选择的集合 ({len(self.selected_collections)} 个):")
         print("-" * 50)
         
-        total_items = 0
         for i, collection_key in enumerate(self.selected_collections, 1):
             collection = self.collection_manager.collections.get(collection_key)
             if collection:
                 path = self.collection_manager.get_collection_path(collection_key)
                 print(f"{i:2d}. {path} ({collection.item_count} 篇)")
-                total_items += collection.item_count
         
-        print(f"\n📊 总计约 {total_items} 篇文献（可能有重复）")
+        # 同一篇文献可能属于多个集合，由数据库去重统计
+        total_items = self.collection_manager.count_unique_items(list(self.selected_collections))
+        print(f"\n📊 总计 {total_items} 篇文献（已去除重复）")
     
     def _clear_selection(self):
         """清空选择"""
@@ -461,20 +551,19 @@ def select_collections_interactive(database_path: str) -> Tuple[List[str], List[
         (选中的集合键列表, 集合中的文献列表)
     """
     try:
-        # 初始化集合管理器
-        collection_manager = CollectionManager(database_path)
-        
-        # 运行集合选择器
-        selector = CollectionSelector(collection_manager)
-        selected_keys = selector.run_interactive_selection()
-        
-        if not selected_keys:
-            print("\n📋 未选择任何集合")
-            return [], []
-        
-        # 获取选中集合的文献
-        print(f"\n📖 正在加载 {len(selected_keys)} 个集合中的文献...")
-        items = collection_manager.get_collection_items(selected_keys)
+        # 初始化集合管理器（退出时关闭数据库连接）
+        with CollectionManager(database_path) as collection_manager:
+            # 运行集合选择器
+            selector = CollectionSelector(collection_manager)
+            selected_keys = selector.run_interactive_selection()
+            
+            if not selected_keys:
+                print("\n📋 未选择任何集合")
+                return [], []
+            
+            # 获取选中集合的文献
+            print(f"\n📖 正在加载 {len(selected_keys)} 个集合中的文献...")
+            items = collection_manager.get_collection_items(selected_keys)
         
         print(f"✅ 成功加载 {len(items)} 篇文献")
         return selected_keys, items
@@ -485,7 +574,7 @@ def select_collections_interactive(database_path: str) -> Tuple[List[str], List[
         return [], []
 
 
-def get_available_collections(database_path: str) -> List[ZoteroCollection]:
+def get_available_collections(database_path: str) -> Tuple[ZoteroCollection, ...]:
     """
     获取可用集合列表（非交互式）
     
@@ -496,8 +585,8 @@ def get_available_collections(database_path: str) -> List[ZoteroCollection]:
         集合列表
     """
     try:
-        collection_manager = CollectionManager(database_path)
-        return collection_manager.get_all_collections()
+        with CollectionManager(database_path) as collection_manager:
+            return collection_manager.get_all_collections()
     except Exception as e:
         logger.error(f"获取集合列表失败: {e}")
-        return [] 
\ No newline at end of file
+        return () 
\ No newline at end of file
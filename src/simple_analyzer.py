@@ -15,17 +15,19 @@ python zotero_local_analyzer.py --api-key YOUR_API_KEY [其他选项]
 
 import argparse
 import os
+import re
 import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from loguru import logger
-import time
 
 # 导入自定义模块
 from .zotero_reader import get_local_zotero_items, LocalZoteroReader
 from .analyzer import PaperAnalyzer, PaperAnalysis
-from .exporter import export_to_csv
+from .exporter import CSVExporter
+from .rate_limiter import RateLimiter
 
 
 def setup_logger(debug: bool = False):
@@ -66,27 +68,38 @@ def filter_papers(papers: List[dict],
     Returns:
         过滤后的文献列表
     """
-    filtered_papers = papers.copy()
+    include_types = frozenset(include_types or ())
+    # 所有排除关键词合并为一个正则，每个标题只扫描一次
+    exclude_pattern = None
+    if exclude_keywords:
+        exclude_pattern = re.compile("|".join(re.escape(keyword.lower()) for keyword in exclude_keywords))
+    
+    # 一次遍历同时完成类型过滤、关键词排除和数量限制；
+    # 达到上限后仍继续计数，使过滤日志反映全部文献
+    filtered_papers = []
+    type_kept = 0
+    kw_excluded = 0
+    for paper in papers:
+        # 按类型过滤
+        if include_types and paper.get('typeName') not in include_types:
+            continue
+        type_kept += 1
+        
+        # 按关键词排除
+        if exclude_pattern is not None and exclude_pattern.search(paper.get('title', '').lower()):
+            kw_excluded += 1
+            continue
+        
+        if not limit or len(filtered_papers) < limit:
+            filtered_papers.append(paper)
     
-    # 按类型过滤
     if include_types:
-        filtered_papers = [p for p in filtered_papers if p.get('typeName') in include_types]
-        logger.info(f"按类型过滤后剩余 {len(filtered_papers)} 篇文献")
+        logger.info(f"按类型过滤后剩余 {type_kept} 篇文献")
+    if kw_excluded > 0:
+        logger.info(f"按关键词排除了 {kw_excluded} 篇文献，剩余 {type_kept - kw_excluded} 篇")
     
-    # 按关键词排除
-    if exclude_keywords:
-        original_count = len(filtered_papers)
-        filtered_papers = [
-            p for p in filtered_papers 
-            if not any(keyword.lower() in p.get('title', '').lower() for keyword in exclude_keywords)
-        ]
-        excluded_count = original_count - len(filtered_papers)
-        if excluded_count > 0:
-            logger.info(f"按关键词排除了 {excluded_count} 篇文献，剩余 {len(filtered_papers)} 篇")
-    
-    # 限制数量
-    if limit and len(filtered_papers) > limit:
-        filtered_papers = filtered_papers[:limit]
+    # 限制数量（还有剩余符合条件的文献时才提示）
+    if limit and type_kept - kw_excluded > limit:
         logger.info(f"限制处理数量为 {limit} 篇文献")
     
     return filtered_papers
@@ -96,7 +109,8 @@ def analyze_papers_batch(papers: List[dict],
                         analyzer: PaperAnalyzer,
                         zotero_data_dir: Optional[str] = None,
                         batch_size: int = 1,
-                        delay_between_calls: float = 1.0) -> List[PaperAnalysis]:
+                        delay_between_calls: float = 1.0,
+                        concurrency: int = 8) -> List[PaperAnalysis]:
     """
     批量分析文献
     
@@ -105,58 +119,97 @@ def analyze_papers_batch(papers: List[dict],
         analyzer: 文献分析器
         zotero_data_dir: Zotero 数据目录
         batch_size: 批处理大小
-        delay_between_calls: API 调用间隔（秒）
+        delay_between_calls: API 调用间隔（秒），换算为每分钟请求数限流
+        concurrency: 同时进行的 API 请求数
         
     Returns:
         分析结果列表
     """
-    analyses = []
+    analyses = list(iter_analyses(papers, analyzer, zotero_data_dir, delay_between_calls, concurrency))
+    
+    logger.success(f"批量分析完成，共处理 {len(analyses)} 篇文献")
+    return analyses
+
+
+def iter_analyses(papers: List[dict],
+                  analyzer: PaperAnalyzer,
+                  zotero_data_dir: Optional[str] = None,
+                  delay_between_calls: float = 1.0,
+                  concurrency: int = 8) -> Iterator[PaperAnalysis]:
+    """
+    并发分析文献，按输入顺序逐篇返回结果（生成器）
+    
+    前面的文献都分析完成后立即返回下一篇的结果，调用方可以边分析边导出，无需等待整批结束
+    
+    Args:
+        papers: 文献列表
+        analyzer: 文献分析器
+        zotero_data_dir: Zotero 数据目录
+        delay_between_calls: API 调用间隔（秒），换算为每分钟请求数限流
+        concurrency: 同时进行的 API 请求数
+        
+    Returns:
+        分析结果迭代器
+    """
     total_papers = len(papers)
     
-    logger.info(f"开始批量分析 {total_papers} 篇文献，批大小: {batch_size}")
+    logger.info(f"开始批量分析 {total_papers} 篇文献，并发数: {concurrency}")
     
-    with tqdm(total=total_papers, desc="分析进度") as pbar:
-        for i in range(0, total_papers, batch_size):
-            batch = papers[i:i + batch_size]
-            
-            for paper in batch:
+    # 用令牌桶限流代替每次调用后的固定等待，并发请求共享同一速率
+    rate_limiter = RateLimiter(rpm=60 / delay_between_calls if delay_between_calls > 0 else None)
+    
+    def analyze_one(paper: dict) -> PaperAnalysis:
+        rate_limiter.acquire()
+        return analyzer.analyze_paper(paper, zotero_data_dir)
+    
+    # 每次分析都阻塞在远程 API 请求上，用线程池并发发起请求；
+    # 各线程的请求都在分析器共享的事件循环中发出，复用同一个客户端的连接池
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    futures = {executor.submit(analyze_one, paper): i for i, paper in enumerate(papers)}
+    
+    # 已完成但前面还有文献未完成的结果，按序号暂存
+    pending: Dict[int, PaperAnalysis] = {}
+    next_index = 0
+    
+    try:
+        # 限制刷新频率，避免每篇都重绘终端
+        with tqdm(total=total_papers, desc="分析进度", mininterval=0.5, smoothing=0.1) as pbar:
+            for future in as_completed(futures):
+                i = futures[future]
+                paper = papers[i]
                 try:
-                    # 分析单篇文献
-                    analysis = analyzer.analyze_paper(paper, zotero_data_dir)
-                    analyses.append(analysis)
+                    pending[i] = future.result()
                     
-                    # 更新进度条
-                    pbar.set_description(f"已完成: {paper.get('title', 'Unknown')[:50]}...")
-                    pbar.update(1)
-                    
-                    # API 调用间隔
-                    if delay_between_calls > 0:
-                        time.sleep(delay_between_calls)
-                        
-                except KeyboardInterrupt:
-                    logger.warning("用户中断，正在保存已分析的结果...")
-                    return analyses
+                    # 更新进度条（不立即刷新，随 update 按 mininterval 刷新）
+                    pbar.set_postfix_str(paper.get('title', 'Unknown')[:40], refresh=False)
                     
                 except Exception as e:
                     logger.error(f"分析文献失败: {paper.get('title', 'Unknown')}: {e}")
                     # 创建错误分析结果
-                    error_analysis = PaperAnalysis(
+                    pending[i] = PaperAnalysis(
                         title=paper.get('title', '未知标题'),
                         authors='; '.join([c.get('name', '') for c in paper.get('creators', [])]),
                         abstract=paper.get('abstractNote', ''),
                         innovation_points=f"分析失败: {str(e)}",
                         summary=f"分析失败: {str(e)}",
-                        original_abstract=paper.get('abstractNote', ''),
                         error_message=str(e)
                     )
-                    analyses.append(error_analysis)
-                    pbar.update(1)
-                    
-                    # 继续处理下一篇
-                    continue
-    
-    logger.success(f"批量分析完成，共处理 {len(analyses)} 篇文献")
-    return analyses
+                
+                pbar.update(1)
+                
+                # 按输入顺序返回已连续完成的结果
+                while next_index in pending:
+                    yield pending.pop(next_index)
+                    next_index += 1
+                
+    except KeyboardInterrupt:
+        logger.warning("用户中断，正在保存已分析的结果...")
+        # 返回已完成的结果（中间未完成的文献跳过）
+        for i in sorted(pending):
+            yield pending[i]
+        
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def main():
@@ -250,6 +303,13 @@ def main():
         help='API 调用间隔秒数（默认: 1.0）'
     )
     
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=8,
+        help='同时进行的 API 请求数（默认: 8）'
+    )
+    
     parser.add_argument(
         '--export-detailed',
         action='store_true',
@@ -318,26 +378,30 @@ def main():
             except Exception:
                 logger.warning("无法确定 Zotero 数据目录，PDF 附件可能无法读取")
         
-        # 5. 批量分析文献
-        analyses = analyze_papers_batch(
-            filtered_papers,
-            analyzer,
-            zotero_data_dir=zotero_data_dir,
-            delay_between_calls=args.delay
-        )
+        # 5. 批量分析文献，每篇结果完成后立即写入 CSV 文件（结束后关闭分析器的事件循环和 API 客户端）
+        exporter = CSVExporter(args.output_dir)
+        with analyzer:
+            basic_file, analyses = exporter.export_analyses_streaming(
+                iter_analyses(
+                    filtered_papers,
+                    analyzer,
+                    zotero_data_dir=zotero_data_dir,
+                    delay_between_calls=args.delay,
+                    concurrency=args.concurrency
+                )
+            )
         
         if not analyses:
             logger.error("没有成功分析任何文献")
             sys.exit(1)
         
-        # 6. 导出结果
-        logger.info("开始导出分析结果...")
-        exported_files = export_to_csv(
-            analyses,
-            output_dir=args.output_dir,
-            export_statistics=True,
-            export_detailed=args.export_detailed
-        )
+        # 6. 导出统计信息和详细报告
+        logger.info("开始导出统计信息...")
+        exported_files = [basic_file]
+        exported_files.append(exporter.export_summary_statistics(analyses))
+        
+        if args.export_detailed:
+            exported_files.append(exporter.export_detailed_report(analyses))
         
         # 7. 显示结果统计
         successful_count = sum(1 for a in analyses if not a.error_message)
@@ -1,11 +1,168 @@
+import functools
 import sqlite3
 import os
 import platform
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Dict, Iterator, List, Optional
 from loguru import logger
 import json
 
+# 只读连接的性能参数：临时表放内存，64 MiB 页缓存，256 MiB 内存映射读取
+# （journal_mode、synchronous、page_size 只影响写入，只读连接不设置）
+_READ_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+)
+
+# 批量 IN 查询每批的条目数（低于 SQLite 默认的 999 个参数上限）
+_IN_QUERY_BATCH_SIZE = 900
+
+# 尚未从数据库读取的值（区别于读取结果为 None）
+_UNSET = object()
+
+# 每个连接的预编译语句缓存数：各类查询不到 20 条不同语句（批量查询按整批和最后一批各一条），全部常驻缓存
+_CACHED_STATEMENTS = 32
+
+
+# 查询语句（批量查询模板中的 {placeholders} 由 _batch_query 按条目数展开为 IN 占位符）
+_SQL_FIELDS = "SELECT fieldID, fieldName FROM fields"
+
+_SQL_CREATOR_TYPES = "SELECT creatorTypeID, creatorType FROM creatorTypes"
+
+_SQL_ITEMS = """
+SELECT 
+    i.itemID,
+    i.itemTypeID,
+    it.typeName,
+    i.dateAdded,
+    i.dateModified,
+    i.key
+FROM items i
+JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
+WHERE it.typeName NOT IN ('note', 'attachment')
+ORDER BY i.dateAdded DESC
+"""
+
+_SQL_ITEMS_CREATORS = """
+SELECT 
+    ic.itemID,
+    COALESCE(c.firstName, ''),
+    COALESCE(c.lastName, ''),
+    ic.creatorTypeID,
+    TRIM(COALESCE(c.firstName, '') || ' ' || COALESCE(c.lastName, ''))
+FROM itemCreators ic
+JOIN creators c ON ic.creatorID = c.creatorID
+WHERE ic.itemID IN ({placeholders})
+ORDER BY ic.itemID, ic.orderIndex
+"""
+
+_SQL_ITEMS_DATA = """
+SELECT id.itemID, id.fieldID, ifv.value
+FROM itemData id
+JOIN itemDataValues ifv ON id.valueID = ifv.valueID
+WHERE id.itemID IN ({placeholders})
+"""
+
+_SQL_ITEMS_TAGS = """
+SELECT it.itemID, t.name
+FROM itemTags it
+JOIN tags t ON it.tagID = t.tagID
+WHERE it.itemID IN ({placeholders})
+"""
+
+_SQL_ITEMS_ATTACHMENTS = """
+SELECT 
+    ia.parentItemID,
+    i.key,
+    ifv.value as title,
+    ia.path,
+    ia.contentType
+FROM items i
+JOIN itemAttachments ia ON i.itemID = ia.itemID
+LEFT JOIN itemData id ON i.itemID = id.itemID AND id.fieldID = ?
+LEFT JOIN itemDataValues ifv ON id.valueID = ifv.valueID
+WHERE ia.parentItemID IN ({placeholders})
+"""
+
+_SQL_ITEMS_NOTES = """
+SELECT in_.parentItemID, in_.note
+FROM items i
+JOIN itemNotes in_ ON i.itemID = in_.itemID
+WHERE in_.parentItemID IN ({placeholders})
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _batch_query(template: str, count: int) -> str:
+    """展开批量查询模板中的 IN 占位符（同一模板和条目数只拼接一次）"""
+    return template.format(placeholders=','.join('?' * count))
+
+
+def connect_database(database_path: str) -> sqlite3.Connection:
+    """
+    以只读方式打开 Zotero 数据库
+    
+    使用 mode=ro&immutable=1 的 URI 打开：不加锁、不写入数据库文件，
+    Zotero 运行并锁定数据库时也能读取（读取的是主数据库文件中已提交的内容）
+    
+    Args:
+        database_path: Zotero 数据库文件路径
+        
+    Returns:
+        数据库连接
+    """
+    uri = f"{Path(database_path).resolve().as_uri()}?mode=ro&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, cached_statements=_CACHED_STATEMENTS)
+    for pragma in _READ_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+@functools.lru_cache(maxsize=1)
+def _find_zotero_database() -> str:
+    """自动查找 Zotero 数据库文件（结果在进程内缓存，多个读取器不再重复检查路径）"""
+    system = platform.system()
+    
+    if system == "Windows":
+        # Windows 路径
+        base_path = Path.home() / "Zotero"
+        if not base_path.exists():
+            base_path = Path(os.environ.get("APPDATA", "")) / "Zotero" / "Zotero"
+    elif system == "Darwin":  # macOS
+        base_path = Path.home() / "Zotero"
+    else:  # Linux
+        base_path = Path.home() / "Zotero"
+    
+    database_file = base_path / "zotero.sqlite"
+    
+    if not database_file.exists():
+        # 尝试在常见位置查找
+        possible_paths = [
+            Path.home() / "Documents" / "Zotero" / "zotero.sqlite",
+            Path.home() / ".zotero" / "zotero.sqlite",
+        ]
+        
+        for path in possible_paths:
+            if path.exists():
+                return str(path)
+        
+        # macOS 配置目录名带随机前缀（如 abcd1234.default），需要展开通配符
+        profile_db = next(
+            (Path.home() / "Library" / "Application Support" / "Zotero" / "Profiles").glob("*.default/zotero.sqlite"),
+            None
+        )
+        if profile_db is not None:
+            return str(profile_db)
+        
+        raise FileNotFoundError("无法找到 Zotero 数据库文件，请手动指定路径")
+    
+    return str(database_file)
+
+
 class LocalZoteroReader:
     """读取本地 Zotero SQLite 数据库的类"""
     
@@ -19,202 +176,241 @@ class LocalZoteroReader:
         if database_path:
             self.database_path = database_path
         else:
-            self.database_path = self._find_zotero_database()
+            self.database_path = _find_zotero_database()
         
         if not os.path.exists(self.database_path):
             raise FileNotFoundError(f"Zotero 数据库文件未找到: {self.database_path}")
         
+        # 数据库连接在首次读取时打开，之后复用（保留页缓存和语句缓存）
+        self._conn: Optional[sqlite3.Connection] = None
+        # 字段名和创作者类型的小型字典表，首次查询详细数据时一次性读入内存，查询中不再 JOIN
+        self._field_names: Optional[Dict[int, str]] = None
+        self._creator_types: Optional[Dict[int, str]] = None
+        # 标题字段的 fieldID，首次查询附件时从字段表中查找
+        self._title_field_id = _UNSET
+        
         logger.info(f"使用 Zotero 数据库: {self.database_path}")
     
-    def _find_zotero_database(self) -> str:
-        """自动查找 Zotero 数据库文件"""
-        system = platform.system()
-        
-        if system == "Windows":
-            # Windows 路径
-            base_path = Path.home() / "Zotero"
-            if not base_path.exists():
-                base_path = Path(os.environ.get("APPDATA", "")) / "Zotero" / "Zotero"
-        elif system == "Darwin":  # macOS
-            base_path = Path.home() / "Zotero"
-        else:  # Linux
-            base_path = Path.home() / "Zotero"
-        
-        database_file = base_path / "zotero.sqlite"
-        
-        if not database_file.exists():
-            # 尝试在常见位置查找
-            possible_paths = [
-                Path.home() / "Documents" / "Zotero" / "zotero.sqlite",
-                Path.home() / ".zotero" / "zotero.sqlite",
-                Path.home() / "Library" / "Application Support" / "Zotero" / "Profiles" / "*.default" / "zotero.sqlite"
-            ]
-            
-            for path in possible_paths:
-                if path.exists():
-                    return str(path)
-            
-            raise FileNotFoundError("无法找到 Zotero 数据库文件，请手动指定路径")
-        
-        return str(database_file)
+    def _get_connection(self) -> sqlite3.Connection:
+        """获取复用的只读数据库连接"""
+        if self._conn is None:
+            # 不设置行工厂：各查询按列位置解包普通元组，不为每行构造 Row 对象
+            self._conn = connect_database(self.database_path)
+        return self._conn
+    
+    def close(self):
+        """关闭数据库连接"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
     
     def get_all_items(self) -> List[Dict]:
         """获取所有文献条目"""
-        conn = sqlite3.connect(self.database_path)
-        conn.row_factory = sqlite3.Row  # 使用行工厂以获得字典样式的访问
+        return list(self.iter_all_items())
+    
+    def iter_all_items(self) -> Iterator[Dict]:
+        """逐篇读取所有文献条目（生成器，不在内存中保留整个文献列表）"""
+        conn = self._get_connection()
+        
+        # 条目列表逐行读取，详细数据查询使用另一个游标
+        cursor = conn.cursor()
+        
+        # 查询所有文献条目的基本信息
+        item_count = 0
+        for item in self._iter_items_with_details(cursor, conn.execute(_SQL_ITEMS)):
+            item_count += 1
+            yield item
+        
+        logger.info(f"从本地 Zotero 数据库读取了 {item_count} 篇文献")
+    
+    def _iter_items_with_details(self, cursor, rows) -> Iterator[Dict]:
+        """
+        为条目基本信息逐批补充字段、创作者、标签、附件和笔记
         
-        try:
-            cursor = conn.cursor()
+        每批最多 _IN_QUERY_BATCH_SIZE 个条目，各类详细数据每批各用一次 IN 查询获取，再按 itemID 分组，
+        避免逐条目查询
+        
+        Args:
+            cursor: 用于详细数据查询的游标（不能是产生 rows 的游标）
+            rows: 条目基本信息查询的结果游标，列依次为
+                itemID, itemTypeID, typeName, dateAdded, dateModified, key
             
-            # 查询所有文献条目的基本信息
-            query = """
-            SELECT 
-                i.itemID,
-                i.itemTypeID,
-                it.typeName,
-                i.dateAdded,
-                i.dateModified,
-                i.key
-            FROM items i
-            JOIN itemTypes it ON i.itemTypeID = it.itemTypeID
-            WHERE i.itemTypeID NOT IN (
-                SELECT itemTypeID FROM itemTypes 
-                WHERE typeName IN ('note', 'attachment')
-            )
-            ORDER BY i.dateAdded DESC
-            """
+        Returns:
+            条目字典迭代器
+        """
+        while True:
+            batch = rows.fetchmany(_IN_QUERY_BATCH_SIZE)
+            if not batch:
+                break
             
-            cursor.execute(query)
-            items = []
+            item_ids = [row[0] for row in batch]
+            data_by_item = self._get_items_data(cursor, item_ids)
+            creators_by_item = self._get_items_creators(cursor, item_ids)
+            tags_by_item = self._get_items_tags(cursor, item_ids)
+            attachments_by_item = self._get_items_attachments(cursor, item_ids)
+            notes_by_item = self._get_items_notes(cursor, item_ids)
             
-            for row in cursor.fetchall():
-                item = dict(row)
-                
-                # 获取条目的字段数据
-                item_data = self._get_item_data(cursor, item['itemID'])
-                item.update(item_data)
-                
-                # 获取创作者信息
-                item['creators'] = self._get_item_creators(cursor, item['itemID'])
-                
-                # 获取标签
-                item['tags'] = self._get_item_tags(cursor, item['itemID'])
+            for item_id, item_type_id, type_name, date_added, date_modified, key in batch:
+                item = {
+                    'itemID': item_id,
+                    'itemTypeID': item_type_id,
+                    'typeName': type_name,
+                    'dateAdded': date_added,
+                    'dateModified': date_modified,
+                    'key': key
+                }
                 
-                # 获取附件
-                item['attachments'] = self._get_item_attachments(cursor, item['itemID'])
+                item.update(data_by_item.get(item_id, {}))
+                item['creators'] = creators_by_item.get(item_id, [])
+                item['tags'] = tags_by_item.get(item_id, [])
+                item['attachments'] = attachments_by_item.get(item_id, [])
+                item['notes'] = notes_by_item.get(item_id, [])
                 
-                # 获取笔记
-                item['notes'] = self._get_item_notes(cursor, item['itemID'])
-                
-                items.append(item)
-            
-            logger.info(f"从本地 Zotero 数据库读取了 {len(items)} 篇文献")
-            return items
+                yield item
+    
+    def _get_items_creators(self, cursor, item_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        一次查询获取多个条目的创作者信息
+        
+        Args:
+            cursor: 数据库游标
+            item_ids: 条目 ID 列表（不超过 _IN_QUERY_BATCH_SIZE 个）
             
-        finally:
-            conn.close()
-    
-    def _get_item_data(self, cursor, item_id: int) -> Dict:
-        """获取条目的字段数据"""
-        query = """
-        SELECT f.fieldName, ifv.value
-        FROM itemData id
-        JOIN fields f ON id.fieldID = f.fieldID
-        JOIN itemDataValues ifv ON id.valueID = ifv.valueID
-        WHERE id.itemID = ?
+        Returns:
+            条目 ID 到创作者列表的映射，没有创作者的条目不在其中
         """
+        creator_types = self._get_creator_types(cursor)
         
-        cursor.execute(query, (item_id,))
-        data = {}
-        
-        for row in cursor.fetchall():
-            field_name, value = row
-            data[field_name] = value
-        
-        return data
-    
-    def _get_item_creators(self, cursor, item_id: int) -> List[Dict]:
-        """获取条目的创作者信息"""
-        query = """
-        SELECT 
-            c.firstName,
-            c.lastName,
-            ct.creatorType
-        FROM itemCreators ic
-        JOIN creators c ON ic.creatorID = c.creatorID
-        JOIN creatorTypes ct ON ic.creatorTypeID = ct.creatorTypeID
-        WHERE ic.itemID = ?
-        ORDER BY ic.orderIndex
+        cursor.execute(_batch_query(_SQL_ITEMS_CREATORS, len(item_ids)), item_ids)
+        
+        # 结果已按 itemID 排序，直接分组后用推导式构造；空名字的替换和全名拼接由 SQLite 完成
+        return {
+            item_id: [
+                {
+                    'firstName': firstName,
+                    'lastName': lastName,
+                    'creatorType': creator_types[creator_type_id],
+                    'name': name
+                }
+                for _, firstName, lastName, creator_type_id, name in rows
+                if creator_type_id in creator_types
+            ]
+            for item_id, rows in groupby(cursor, itemgetter(0))
+        }
+    
+    def _get_items_data(self, cursor, item_ids: List[int]) -> Dict[int, Dict]:
+        """
+        一次查询获取多个条目的字段数据
+        
+        Args:
+            cursor: 数据库游标
+            item_ids: 条目 ID 列表（不超过 _IN_QUERY_BATCH_SIZE 个）
+            
+        Returns:
+            条目 ID 到字段数据的映射，没有字段数据的条目不在其中
         """
+        field_names = self._get_field_names(cursor)
         
-        cursor.execute(query, (item_id,))
-        creators = []
+        cursor.execute(_batch_query(_SQL_ITEMS_DATA, len(item_ids)), item_ids)
+        data_by_item = {}
         
-        for row in cursor.fetchall():
-            firstName, lastName, creatorType = row
-            creators.append({
-                'firstName': firstName or '',
-                'lastName': lastName or '',
-                'creatorType': creatorType,
-                'name': f"{firstName or ''} {lastName or ''}".strip()
-            })
+        for item_id, field_id, value in cursor:
+            field_name = field_names.get(field_id)
+            if field_name is not None:
+                data_by_item.setdefault(item_id, {})[field_name] = value
         
-        return creators
+        return data_by_item
     
-    def _get_item_tags(self, cursor, item_id: int) -> List[str]:
-        """获取条目的标签"""
-        query = """
-        SELECT t.name
-        FROM itemTags it
-        JOIN tags t ON it.tagID = t.tagID
-        WHERE it.itemID = ?
+    def _get_items_tags(self, cursor, item_ids: List[int]) -> Dict[int, List[str]]:
         """
+        一次查询获取多个条目的标签
         
-        cursor.execute(query, (item_id,))
-        return [row[0] for row in cursor.fetchall()]
-    
-    def _get_item_attachments(self, cursor, item_id: int) -> List[Dict]:
-        """获取条目的附件"""
-        query = """
-        SELECT 
-            i.key,
-            ifv.value as title,
-            ia.path,
-            ia.contentType
-        FROM items i
-        JOIN itemAttachments ia ON i.itemID = ia.itemID
-        LEFT JOIN itemData id ON i.itemID = id.itemID AND id.fieldID = (
-            SELECT fieldID FROM fields WHERE fieldName = 'title'
-        )
-        LEFT JOIN itemDataValues ifv ON id.valueID = ifv.valueID
-        WHERE ia.parentItemID = ?
+        Args:
+            cursor: 数据库游标
+            item_ids: 条目 ID 列表（不超过 _IN_QUERY_BATCH_SIZE 个）
+            
+        Returns:
+            条目 ID 到标签列表的映射，没有标签的条目不在其中
         """
+        cursor.execute(_batch_query(_SQL_ITEMS_TAGS, len(item_ids)), item_ids)
+        tags_by_item = {}
         
-        cursor.execute(query, (item_id,))
-        attachments = []
+        for item_id, name in cursor:
+            tags_by_item.setdefault(item_id, []).append(name)
         
-        for row in cursor.fetchall():
-            key, title, path, content_type = row
-            attachments.append({
+        return tags_by_item
+    
+    def _get_field_names(self, cursor) -> Dict[int, str]:
+        """获取 fieldID 到字段名的映射（对同一个数据库固定不变，只查询一次）"""
+        if self._field_names is None:
+            cursor.execute(_SQL_FIELDS)
+            self._field_names = dict(cursor)
+        return self._field_names
+    
+    def _get_creator_types(self, cursor) -> Dict[int, str]:
+        """获取 creatorTypeID 到创作者类型名的映射（对同一个数据库固定不变，只查询一次）"""
+        if self._creator_types is None:
+            cursor.execute(_SQL_CREATOR_TYPES)
+            self._creator_types = dict(cursor)
+        return self._creator_types
+    
+    def _get_title_field_id(self, cursor) -> Optional[int]:
+        """获取标题字段的 fieldID"""
+        if self._title_field_id is _UNSET:
+            self._title_field_id = next(
+                (field_id for field_id, name in self._get_field_names(cursor).items() if name == 'title'),
+                None
+            )
+        return self._title_field_id
+    
+    def _get_items_attachments(self, cursor, item_ids: List[int]) -> Dict[int, List[Dict]]:
+        """
+        一次查询获取多个条目的附件
+        
+        Args:
+            cursor: 数据库游标
+            item_ids: 父条目 ID 列表（不超过 _IN_QUERY_BATCH_SIZE 个）
+            
+        Returns:
+            父条目 ID 到附件列表的映射，没有附件的条目不在其中
+        """
+        cursor.execute(_batch_query(_SQL_ITEMS_ATTACHMENTS, len(item_ids)), [self._get_title_field_id(cursor), *item_ids])
+        attachments_by_item = {}
+        
+        for parent_id, key, title, path, content_type in cursor:
+            attachments_by_item.setdefault(parent_id, []).append({
                 'key': key,
                 'title': title or 'Untitled',
                 'path': path,
                 'contentType': content_type
             })
         
-        return attachments
+        return attachments_by_item
     
-    def _get_item_notes(self, cursor, item_id: int) -> List[str]:
-        """获取条目的笔记"""
-        query = """
-        SELECT in_.note
-        FROM items i
-        JOIN itemNotes in_ ON i.itemID = in_.itemID
-        WHERE in_.parentItemID = ?
+    def _get_items_notes(self, cursor, item_ids: List[int]) -> Dict[int, List[str]]:
+        """
+        一次查询获取多个条目的笔记
+        
+        Args:
+            cursor: 数据库游标
+            item_ids: 父条目 ID 列表（不超过 _IN_QUERY_BATCH_SIZE 个）
+            
+        Returns:
+            父条目 ID 到笔记列表的映射，没有笔记的条目不在其中
         """
+        cursor.execute(_batch_query(_SQL_ITEMS_NOTES, len(item_ids)), item_ids)
+        notes_by_item = {}
+        
+        for parent_id, note in cursor:
+            notes_by_item.setdefault(parent_id, []).append(note)
         
-        cursor.execute(query, (item_id,))
-        return [row[0] for row in cursor.fetchall()]
+        return notes_by_item
     
     def get_attachment_path(self, attachment: Dict, zotero_data_dir: Optional[str] = None) -> Optional[str]:
         """获取附件的完整路径"""
@@ -245,5 +441,19 @@ def get_local_zotero_items(database_path: Optional[str] = None) -> List[Dict]:
     Returns:
         文献列表
     """
-    reader = LocalZoteroReader(database_path)
-    return reader.get_all_items() 
\ No newline at end of file
+    with LocalZoteroReader(database_path) as reader:
+        return reader.get_all_items()
+
+
+def iter_local_zotero_items(database_path: Optional[str] = None) -> Iterator[Dict]:
+    """
+    逐篇读取本地 Zotero 文献的便捷函数
+    
+    Args:
+        database_path: Zotero 数据库文件路径，如果为 None 则自动查找
+        
+    Returns:
+        文献生成器（读取完毕或被关闭时关闭数据库连接）
+    """
+    with LocalZoteroReader(database_path) as reader:
+        yield from reader.iter_all_items()